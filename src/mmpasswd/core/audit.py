@@ -0,0 +1,109 @@
+import re
+from .security import SessionHasher
+from .utils import check_password_strength
+
+# Digits and symbols tacked onto the end: "Summer2023!" -> "Summer"
+_SUFFIX = re.compile(r"[\W\d_]+$")
+
+class PasswordAudit:
+    """
+    Vault-wide password audit: weak passwords, passwords reused across
+    entries, and near-duplicates (the same base with different suffixes,
+    like "Summer2023!" and "summer2024").
+
+    Passwords are hashed (HMAC under a per-session key) into a reuse index
+    that is kept between runs. Given the ids that changed since the last
+    run, only their passwords are read and hashed again, and strength
+    scores and bases are cached by digest, so only new passwords are scored.
+    """
+
+    # check_password_strength() scores at or below this are reported as weak
+    WEAK_SCORE = 2
+    # Shorter bases are too common to mean anything
+    MIN_BASE = 4
+
+    def __init__(self):
+        self._hasher = SessionHasher()
+        self._cache = {}         # password digest -> (score, label, base digest or None)
+        self._by_digest = {}     # password digest -> set of ids (the reuse index)
+        self._entry_digest = {}  # id -> password digest
+        self._indexed = False    # the index reflects a completed run
+
+    @classmethod
+    def base_of(cls, password):
+        base = _SUFFIX.sub("", password).lower()
+        return base if len(base) >= cls.MIN_BASE else None
+
+    def _assess(self, password, digest):
+        cached = self._cache.get(digest)
+        if cached is None:
+            score, label, _ = check_password_strength(password)
+            base = self.base_of(password)
+            cached = self._cache[digest] = (score, label, self._hasher.digest(base) if base else None)
+        return cached
+
+    def _add(self, entry_id, password):
+        digest = self._hasher.digest(password)
+        self._entry_digest[entry_id] = digest
+        if digest not in self._by_digest:
+            self._by_digest[digest] = set()
+            self._assess(password, digest)
+        self._by_digest[digest].add(entry_id)
+
+    def _remove(self, entry_id):
+        digest = self._entry_digest.pop(entry_id, None)
+        if digest is None: return
+        ids = self._by_digest[digest]
+        ids.discard(entry_id)
+        if not ids:
+            del self._by_digest[digest]
+            del self._cache[digest]
+
+    def run(self, kdbx_manager, changed_ids=None):
+        """
+        Audits every active entry. Returns {entry id: [finding, ...]} for
+        entries with findings. With changed_ids (entries added, edited,
+        deleted or restored since the last run), only those are read again;
+        without, or before a first complete run, the whole vault is.
+        """
+        try:
+            if changed_ids is None or not self._indexed:
+                self._indexed = False
+                self._by_digest, self._entry_digest = {}, {}
+                for entry_id, password in kdbx_manager.get_passwords('all'):
+                    self._add(entry_id, password)
+                # Forget passwords that are gone
+                self._cache = {d: self._cache[d] for d in self._by_digest}
+            else:
+                for entry_id in changed_ids:
+                    self._remove(entry_id)
+                for entry_id, password in kdbx_manager.get_passwords('all', changed_ids):
+                    self._add(entry_id, password)
+        except BaseException:
+            self._indexed = False # half updated; start over next time
+            raise
+        self._indexed = True
+        return self._findings()
+
+    def _findings(self):
+        by_base = {} # base digest -> password digests sharing it
+        for digest in self._by_digest:
+            base = self._cache[digest][2]
+            if base:
+                by_base.setdefault(base, []).append(digest)
+
+        findings = {}
+        for digest, ids in self._by_digest.items():
+            score, label, base = self._cache[digest]
+            found = []
+            if score <= self.WEAK_SCORE:
+                found.append(f"{label} password")
+            if len(ids) > 1:
+                found.append(f"Reused in {len(ids)} entries")
+            similar = len(by_base[base]) - 1 if base else 0
+            if similar:
+                found.append(f"Similar to {similar} other password{'s' if similar > 1 else ''}")
+            if found:
+                for entry_id in ids:
+                    findings[entry_id] = found
+        return findings
@@ -0,0 +1,117 @@
+import hashlib
+import mmap
+
+class BreachCorpus:
+    """
+    Offline lookup in a downloaded Have I Been Pwned password list, in its
+    "ordered by hash" SHA-1 form: one "HASH:COUNT" line per leaked
+    password, sorted by hash (plain sorted hash lines work too).
+
+    The file is memory-mapped, never read in: the OS pages in the few
+    blocks a lookup touches, so memory stays flat for a 30+ GB file.
+    SHA-1 hashes are uniformly spread, so a lookup interpolates where the
+    hash should be instead of bisecting, which lands within a page or two
+    of it in a handful of steps.
+    """
+
+    # Below this many bytes the remaining range is just searched directly
+    SCAN_BYTES = 4096
+    # Interpolation steps before falling back to bisection (a guard for odd files)
+    MAX_GUESSES = 8
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError("The breach list is empty")
+        if hasattr(self._mm, "madvise") and hasattr(mmap, "MADV_RANDOM"):
+            self._mm.madvise(mmap.MADV_RANDOM) # no read-ahead for scattered lookups
+        first = self._mm[:40]
+        try:
+            int(first, 16)
+        except ValueError:
+            self.close()
+            raise ValueError("Not a SHA-1 breach list (expected sorted HASH:COUNT lines)")
+        self._lowercase = first.lower() == first and first.upper() != first
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+    def count(self, password):
+        """How often a password appears in the breaches (0 if it doesn't)."""
+        return self.count_hash(hashlib.sha1(password.encode("utf-8")).hexdigest())
+
+    def count_hash(self, sha1_hex):
+        target = (sha1_hex.lower() if self._lowercase else sha1_hex.upper()).encode("ascii")
+        mm = self._mm
+        lo, hi = 0, len(mm)      # lines starting before lo sort below target, from hi on above
+        lo_key, hi_key = 0, 16 ** 16
+        t_key = int(target[:16], 16)
+        guesses = 0
+        while hi - lo > self.SCAN_BYTES:
+            if guesses < self.MAX_GUESSES and hi_key > lo_key:
+                guesses += 1
+                frac = (t_key - lo_key) / (hi_key - lo_key)
+                mid = lo + int((hi - lo) * min(max(frac, 0.0), 1.0))
+                mid = min(max(mid, lo), hi - 1)
+            else:
+                mid = (lo + hi) // 2
+            start = mm.rfind(b"\n", 0, mid) + 1 # start of the line holding mid
+            end = mm.find(b"\n", start)
+            if end == -1:
+                end = len(mm)
+            key = mm[start:start + 40]
+            if key == target:
+                return self._line_count(mm[start:end])
+            if key < target:
+                lo, lo_key = end + 1, int(key[:16], 16)
+            else:
+                hi, hi_key = start, int(key[:16], 16)
+
+        chunk = mm[lo:hi]
+        at = chunk.find(target)
+        while at != -1 and at and chunk[at - 1:at] != b"\n":
+            at = chunk.find(target, at + 1)
+        if at == -1:
+            return 0
+        end = chunk.find(b"\n", at)
+        return self._line_count(chunk[at:end if end != -1 else len(chunk)])
+
+    @staticmethod
+    def _line_count(line):
+        _, _, count = line.partition(b":")
+        try:
+            return max(1, int(count.strip() or 1))
+        except ValueError:
+            return 1
+
+def scan(kdbx_manager, corpus, entry_ids=None):
+    """
+    Checks entries' passwords against a BreachCorpus and returns
+    {entry id: times seen} for the compromised ones. Defaults to every
+    active entry. Each distinct password is looked up once, in hash order
+    so that neighbouring lookups share pages of the file.
+    """
+    if entry_ids is None:
+        pairs = kdbx_manager.get_passwords('all')
+    else:
+        pairs = ((i, kdbx_manager.get_password(i)) for i in entry_ids)
+    by_hash = {}
+    for entry_id, password in pairs:
+        if password:
+            digest = hashlib.sha1(password.encode("utf-8")).hexdigest()
+            by_hash.setdefault(digest, []).append(entry_id)
+
+    found = {}
+    for digest in sorted(by_hash):
+        seen = corpus.count_hash(digest)
+        if seen:
+            for entry_id in by_hash[digest]:
+                found[entry_id] = seen
+    return found
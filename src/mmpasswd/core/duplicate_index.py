@@ -0,0 +1,99 @@
+import hmac
+from urllib.parse import urlsplit
+from .security import SessionHasher
+
+def login_key(website, username):
+    """
+    (host, username) an entry is matched on: "https://www.GitHub.com/login"
+    and "github.com" are the same site, usernames compare case-insensitively.
+    """
+    site = (website or "").strip().lower()
+    host = site
+    if site:
+        try:
+            host = urlsplit(site if "//" in site else "//" + site).hostname or site
+        except ValueError:
+            pass
+    if host.startswith("www."):
+        host = host[4:]
+    return host, (username or "").strip().lower()
+
+class DuplicateIndex:
+    """
+    Groups entries by login_key() so "is this already in the vault?" is a
+    dict lookup. Password digests are computed on demand and cached; they
+    are HMACs under a key that only lives for this session, so the cache
+    never holds anything that could be matched against a hash list.
+    """
+
+    NEW = "new"                # no entry for this site and username
+    IDENTICAL = "identical"    # same site, username and password
+    CONFLICT = "conflict"      # same site and username, different password
+
+    def __init__(self):
+        self._hasher = SessionHasher()
+        self._groups = {}  # login key -> set of ids
+        self._keys = {}    # id -> login key
+        self._digests = {} # id -> password digest (filled lazily)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def digest(self, password):
+        return self._hasher.digest(password)
+
+    def add(self, item_id, website, username):
+        """(Re)indexes an item. Its cached digest is dropped, as the password may have changed."""
+        self.remove(item_id)
+        key = login_key(website, username)
+        self._keys[item_id] = key
+        self._groups.setdefault(key, set()).add(item_id)
+
+    def remove(self, item_id):
+        self._digests.pop(item_id, None)
+        key = self._keys.pop(item_id, None)
+        if key is None: return
+        group = self._groups[key]
+        group.discard(item_id)
+        if not group:
+            del self._groups[key]
+
+    def clear(self):
+        self._groups = {}
+        self._keys = {}
+        self._digests = {}
+
+    def key_of(self, item_id):
+        return self._keys.get(item_id)
+
+    def is_duplicate(self, item_id):
+        key = self._keys.get(item_id)
+        return key is not None and len(self._groups[key]) > 1
+
+    def matches(self, website, username):
+        return self._groups.get(login_key(website, username), ())
+
+    def classify(self, website, username, password, read_password):
+        """
+        Returns (NEW | IDENTICAL | CONFLICT, id of the matching item or None).
+        read_password(id) is only called for items sharing the login, once each.
+        """
+        ids = self.matches(website, username)
+        if not ids:
+            return self.NEW, None
+        wanted = self.digest(password)
+        for item_id in ids:
+            digest = self._digests.get(item_id)
+            if digest is None:
+                digest = self._digests[item_id] = self.digest(read_password(item_id))
+            if hmac.compare_digest(digest, wanted):
+                return self.IDENTICAL, item_id
+        return self.CONFLICT, min(ids)
+
+    def duplicate_ids(self):
+        """Ids of every item that shares its login with another one."""
+        ids = set()
+        for group in self._groups.values():
+            if len(group) > 1:
+                ids.update(group)
+        return ids
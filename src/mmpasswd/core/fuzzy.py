@@ -0,0 +1,142 @@
+import heapq
+import re
+from functools import lru_cache
+
+# Ranked, typo-tolerant matching for the search box.
+# Scores are in [0, 1]; anything below MIN_SCORE is not a match.
+
+MIN_SCORE = 0.3
+FAVORITE_BONUS = 0.1
+
+# How much a hit in each record field counts
+FIELD_WEIGHTS = (
+    ('website', 1.0),
+    ('title', 0.9),
+    ('username', 0.8),
+)
+
+_SEGMENT_SPLIT = re.compile(r"[^a-z0-9]+")
+
+def _segments(text):
+    return [s for s in _SEGMENT_SPLIT.split(text) if s]
+
+def _edit_distance(a, b, limit):
+    """Damerau-Levenshtein (adjacent transpositions), giving up once it exceeds limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2 = None
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        row_min = cur[0]
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if (prev2 is not None and i > 1 and j > 1
+                    and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+            row_min = min(row_min, cur[j])
+        if row_min > limit:
+            return limit + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+@lru_cache(maxsize=16)
+def _letters(q):
+    chars = frozenset(q)
+    return chars, tuple((ch, q.count(ch)) for ch in chars)
+
+def typo_limit(q):
+    """How many edits a query of this length may be off by."""
+    if len(q) < 4: return 0
+    if len(q) < 8: return 1
+    return 2
+
+def can_refine(old_query, new_query):
+    """
+    True if every match for new_query is also a candidate for old_query,
+    so a search can narrow the previous candidates instead of starting over.
+    """
+    old_q = old_query.strip().lower()
+    new_q = new_query.strip().lower()
+    return bool(old_q) and old_q in new_q and typo_limit(old_q) == typo_limit(new_q)
+
+def _acronym_score(q, text, segments):
+    # Initials of the segments: "gh" -> "git-hub", "aws" -> "amazon web services"
+    initials = "".join(s[0] for s in segments)
+    if len(q) >= 2 and initials.startswith(q):
+        return 0.6
+    # Subsequence anchored at the first letter: "gh" -> "github", "gmil" -> "gmail"
+    if not text or text[0] != q[0]:
+        return 0.0
+    pos = 0
+    for ch in q:
+        pos = text.find(ch, pos)
+        if pos < 0:
+            return 0.0
+        pos += 1
+    # Tighter subsequences score higher
+    return 0.35 + 0.15 * len(q) / pos
+
+def score_text(q, text):
+    """Scores how well an already-lowercased query matches a lowercased field."""
+    if not q or not text:
+        return 0.0
+    if text == q:
+        return 1.0
+    if text.startswith(q):
+        return 0.9 + 0.05 * len(q) / len(text)
+
+    segments = _segments(text)
+    if any(s.startswith(q) for s in segments):
+        return 0.8
+    pos = text.find(q)
+    if pos >= 0:
+        # Earlier substring hits rank a little higher
+        return 0.7 - 0.1 * pos / len(text)
+
+    best = _acronym_score(q, text, segments)
+
+    limit = typo_limit(q)
+    if limit:
+        q_chars, q_counts = _letters(q)
+        for s in segments:
+            # k typos can make up for at most k letters the segment lacks,
+            # checked by distinct letters, then counting repeats, before
+            # paying for the edit distance
+            if len(q_chars.intersection(s)) < len(q_chars) - limit:
+                continue
+            if sum(max(0, n - s.count(ch)) for ch, n in q_counts) > limit:
+                continue
+            # Compare against the segment and its prefix of the query's length
+            for candidate in (s, s[:len(q)]):
+                d = _edit_distance(q, candidate, limit)
+                if d <= limit:
+                    best = max(best, 0.55 - 0.1 * d)
+    return best
+
+def score_record(q, record):
+    best = 0.0
+    for field, weight in FIELD_WEIGHTS:
+        value = getattr(record, field)
+        if value:
+            best = max(best, weight * score_text(q, value.lower()))
+    if best < MIN_SCORE:
+        return 0.0
+    if record.is_favorite:
+        best += FAVORITE_BONUS
+    return best
+
+def top_matches(query, records, limit=50):
+    """
+    Yields (score, record) for the best `limit` matches, best first.
+    Uses a bounded heap, so nothing beyond the top `limit` is ever sorted.
+    """
+    q = query.strip().lower()
+    if not q: return
+    scored = ((score_record(q, r), r.sort_key, r) for r in records)
+    matches = (item for item in scored if item[0] > 0)
+    # Ties broken alphabetically, like the unranked list
+    best = heapq.nsmallest(limit, matches, key=lambda item: (-item[0], item[1]))
+    for score, _, record in best:
+        yield score, record
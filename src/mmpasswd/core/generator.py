@@ -0,0 +1,283 @@
+import math
+import os
+import string
+import threading
+import time
+from functools import lru_cache
+from . import wordlists
+from .duplicate_index import login_key
+
+# Password and passphrase generation.
+# Policies are plain dicts; missing keys take their DEFAULT_POLICY value:
+#   {"length": int, "upper": bool, "lower": bool, "digits": bool, "symbols": bool,
+#    "symbol_set": str, "require_each": bool, "exclude_ambiguous": bool, "exclude": str}
+
+SYMBOLS = "!@#$%^&*()_+-=[]{}|;:,.<>?"
+# Characters that are easy to misread or mistype from a printout
+AMBIGUOUS = "0Oo1Il|"
+
+DEFAULT_POLICY = {
+    "length": 16,
+    "upper": True,
+    "lower": True,
+    "digits": True,
+    "symbols": True,
+    "symbol_set": SYMBOLS,
+    "require_each": True,     # at least one character from every enabled class
+    "exclude_ambiguous": False,
+    "exclude": "",            # further characters to leave out
+}
+
+MAX_LENGTH = 256
+
+class RandomPool:
+    """
+    Randomness from os.urandom, read POOL_BYTES at a time and handed out in
+    slices, so generating thousands of passwords costs a few system calls
+    instead of one per character.
+    """
+
+    POOL_BYTES = 64 * 1024
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buf = b""
+        self._pos = 0
+        if hasattr(os, "register_at_fork"):
+            # A forked child must never hand out the same bytes as its parent
+            os.register_at_fork(after_in_child=self.discard)
+
+    def discard(self):
+        self._buf = b""
+        self._pos = 0
+
+    def take(self, n):
+        with self._lock:
+            if self._pos + n > len(self._buf):
+                self._buf = os.urandom(max(self.POOL_BYTES, n))
+                self._pos = 0
+            chunk = self._buf[self._pos:self._pos + n]
+            self._pos += n
+            return chunk
+
+_pool = RandomPool()
+
+# --- Unbiased sampling ---
+#
+# A random byte modulo the alphabet size would favour the first 256 % n
+# characters. Bytes at or above the largest multiple of n are rejected
+# instead; bytes.translate() does the mapping and the rejection in one C
+# call per chunk.
+
+@lru_cache(maxsize=32)
+def _byte_tables(alphabet):
+    n = len(alphabet)
+    limit = 256 - 256 % n
+    table = bytes(ord(alphabet[b % n]) if b < limit else 0 for b in range(256))
+    return table, bytes(range(limit, 256)), limit
+
+def random_chars(alphabet, count, pool=_pool):
+    """count characters drawn uniformly from an ASCII alphabet of at most 256 characters."""
+    table, rejected, limit = _byte_tables(alphabet)
+    chunks, got = [], 0
+    while got < count:
+        # Enough bytes on average, plus a little so a second round is rare
+        raw = pool.take((count - got) * 256 // limit + 16)
+        chunk = raw.translate(table, rejected)
+        chunks.append(chunk)
+        got += len(chunk)
+    return b"".join(chunks)[:count].decode("ascii")
+
+def random_indices(n, count, pool=_pool):
+    """count integers drawn uniformly from range(n), for n up to 65536."""
+    limit = 65536 - 65536 % n
+    picked = []
+    while len(picked) < count:
+        raw = pool.take(((count - len(picked)) * 65536 // limit + 8) * 2)
+        picked.extend(v % n for v in memoryview(raw).cast("H") if v < limit)
+    return picked[:count]
+
+# --- Passwords ---
+
+def resolve_policy(policy=None):
+    resolved = dict(DEFAULT_POLICY)
+    resolved.update(policy or {})
+    return resolved
+
+def character_classes(policy):
+    """The enabled character classes of a policy, with excluded characters removed."""
+    policy = resolve_policy(policy)
+    excluded = set(policy["exclude"])
+    if policy["exclude_ambiguous"]:
+        excluded.update(AMBIGUOUS)
+    classes = []
+    for key, chars in (("lower", string.ascii_lowercase), ("upper", string.ascii_uppercase),
+                       ("digits", string.digits), ("symbols", policy["symbol_set"])):
+        if policy[key]:
+            chars = "".join(c for c in dict.fromkeys(chars) if c not in excluded)
+            if chars:
+                classes.append(chars)
+    return classes
+
+def generate_passwords(count=1, policy=None):
+    """
+    Generates count passwords following a policy (see DEFAULT_POLICY).
+
+    All the characters come from one draw on the pool. When every class is
+    required, passwords missing one are thrown away and drawn again rather
+    than patched, which would make the patched positions predictable.
+    """
+    policy = resolve_policy(policy)
+    length = int(policy["length"])
+    classes = character_classes(policy)
+    if not classes:
+        raise ValueError("The policy leaves no characters to choose from")
+    if not 1 <= length <= MAX_LENGTH:
+        raise ValueError(f"Length must be between 1 and {MAX_LENGTH}")
+    if policy["require_each"] and length < len(classes):
+        raise ValueError(f"Length must be at least {len(classes)} to include every character type")
+    alphabet = "".join(classes)
+    if len(alphabet) > 256 or not alphabet.isascii():
+        raise ValueError("Only ASCII symbols are supported")
+
+    required = [set(c) for c in classes] if policy["require_each"] else []
+    passwords = []
+    while len(passwords) < count:
+        text = random_chars(alphabet, (count - len(passwords)) * length)
+        for start in range(0, len(text), length):
+            password = text[start:start + length]
+            if all(not chars.isdisjoint(password) for chars in required):
+                passwords.append(password)
+    return passwords[:count]
+
+def password_bits(policy=None):
+    """Entropy of a password from the policy, ignoring the small loss from required classes."""
+    policy = resolve_policy(policy)
+    return int(policy["length"]) * math.log2(len("".join(character_classes(policy))) or 1)
+
+# --- Passphrases ---
+
+@lru_cache(maxsize=1)
+def diceware_words():
+    """Short, plain words from the bundled English list, most common first."""
+    words = (w for w in wordlists.ENGLISH.split() if 3 <= len(w) <= 8 and w.isascii() and w.isalpha())
+    return tuple(dict.fromkeys(words))
+
+def generate_passphrases(count=1, words=6, separator="-", capitalize=False):
+    """Generates count passphrases of words picked uniformly from diceware_words()."""
+    if words < 1:
+        raise ValueError("A passphrase needs at least one word")
+    vocabulary = diceware_words()
+    picks = random_indices(len(vocabulary), count * words)
+    phrases = []
+    for start in range(0, len(picks), words):
+        chosen = [vocabulary[i] for i in picks[start:start + words]]
+        if capitalize:
+            chosen = [w.capitalize() for w in chosen]
+        phrases.append(separator.join(chosen))
+    return phrases
+
+def passphrase_bits(words=6):
+    return words * math.log2(len(diceware_words()))
+
+# --- Per-site rules ---
+
+def parse_site_rules(text):
+    """
+    Reads per-site policy overrides, one site per line:
+
+        example.com length=12 symbols=no
+        bank.example symbol_set=!#$ exclude_ambiguous=yes
+
+    Returns {host: overrides}. Rules apply to subdomains too. Blank lines
+    and lines starting with # are ignored.
+    """
+    rules = {}
+    for number, line in enumerate((text or "").splitlines(), 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        site, *settings = line.split()
+        host = login_key(site, "")[0]
+        overrides = {}
+        for setting in settings:
+            key, sep, value = setting.partition("=")
+            if not sep or key not in DEFAULT_POLICY:
+                raise ValueError(f"Line {number}: unknown setting {setting!r}")
+            default = DEFAULT_POLICY[key]
+            if isinstance(default, bool):
+                if value.lower() not in ("yes", "no", "true", "false", "on", "off", "1", "0"):
+                    raise ValueError(f"Line {number}: {key} must be yes or no")
+                overrides[key] = value.lower() in ("yes", "true", "on", "1")
+            elif isinstance(default, int):
+                if not value.isdigit():
+                    raise ValueError(f"Line {number}: {key} must be a number")
+                overrides[key] = int(value)
+            else:
+                overrides[key] = value
+        rules[host] = overrides
+    return rules
+
+def policy_for(website, base=None, rules=None):
+    """base with the most specific rule matching the website's host applied."""
+    policy = resolve_policy(base)
+    host = login_key(website, "")[0]
+    best = None
+    for rule_host in (rules or {}):
+        if host == rule_host or host.endswith("." + rule_host):
+            if best is None or len(rule_host) > len(best):
+                best = rule_host
+    if best is not None:
+        policy.update(rules[best])
+    return policy
+
+def configured_policy(kdbx_manager):
+    """(base policy, site rules) from the generator settings stored in the vault."""
+    base = {}
+    length = kdbx_manager.get_config("generator_length")
+    if length:
+        base["length"] = int(length)
+    if kdbx_manager.get_config("generator_exclude_ambiguous") == "1":
+        base["exclude_ambiguous"] = True
+    return base, parse_site_rules(kdbx_manager.get_config("generator_site_rules", ""))
+
+# --- Rotation ---
+
+def rotate(kdbx_manager, entry_ids, base=None, rules=None):
+    """
+    Gives entries fresh passwords, each following its site's policy, in a
+    single batch (one save). Entries sharing a policy get their passwords
+    from one generate_passwords() call. Returns the ids that were changed;
+    if anything fails, every password is put back.
+    """
+    by_policy = {}
+    for entry_id in entry_ids:
+        entry = kdbx_manager.get_entry(entry_id)
+        if not entry:
+            continue
+        policy = policy_for(entry.get('website'), base, rules)
+        by_policy.setdefault(tuple(sorted(policy.items())), []).append(entry_id)
+
+    passwords = {}
+    for key, ids in by_policy.items():
+        passwords.update(zip(ids, generate_passwords(len(ids), dict(key))))
+    with kdbx_manager.batch():
+        return kdbx_manager.set_passwords(passwords)
+
+# --- Benchmark ---
+
+def benchmark(count=100000, policy=None):
+    """Returns (passwords per second, passphrases per second) for bulk generation here."""
+    started = time.perf_counter()
+    generate_passwords(count, policy)
+    passwords = count / max(time.perf_counter() - started, 1e-9)
+    started = time.perf_counter()
+    generate_passphrases(count)
+    passphrases = count / max(time.perf_counter() - started, 1e-9)
+    return passwords, passphrases
+
+if __name__ == "__main__":
+    # python -m mmpasswd.core.generator
+    per_sec, phrases_per_sec = benchmark()
+    print(f"{per_sec:,.0f} passwords/s ({password_bits():.0f} bits each)")
+    print(f"{phrases_per_sec:,.0f} passphrases/s ({passphrase_bits():.0f} bits each)")
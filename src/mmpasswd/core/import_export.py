@@ -1,24 +1,382 @@
 import csv
+import json
+import os
+import time
+from itertools import islice
+import xml.etree.ElementTree as ET
+from .keepass_db import MergeResult
+
+class ImportCancelled(Exception):
+    """The import was cancelled; the vault was left as it was."""
+
+# --- Importers ---
+#
+# An importer recognises one export format and streams its records as
+# normalized rows ({'username', 'password', 'website'}, plus 'notes' and
+# 'is_favorite' when the format has them).
+# Everything after that (chunking, batching, progress, rollback) is shared,
+# see ImportExportManager.import_file(). New formats only need a class here
+# decorated with @register_importer.
+
+IMPORTERS = []
+
+def register_importer(cls):
+    IMPORTERS.append(cls())
+    return cls
+
+def detect_importer(filepath):
+    """Returns the importer for a file, or None if no format matches."""
+    with open(filepath, 'r', encoding='utf-8-sig', errors='replace') as f:
+        head = f.read(64 * 1024)
+    ext = os.path.splitext(filepath)[1].lower()
+    for importer in IMPORTERS:
+        if ext in importer.extensions and importer.detect(head):
+            return importer
+    return None
+
+def normalize(title="", url="", username="", password="", notes=None, favorite=None):
+    """
+    Maps a source record onto our fields. Returns None for records with no login.
+    notes and favorite are left out of the row when the format has no such
+    field (None), so overwriting a duplicate doesn't clear the entry's own.
+    """
+    username = (username or "").strip()
+    password = password or ""
+    if not username and not password:
+        return None # secure notes, cards, identities...
+    row = {
+        'username': username,
+        'password': password,
+        # The vault shows the website as the entry name; fall back to the title
+        'website': (url or "").strip() or (title or "").strip(),
+    }
+    if notes is not None:
+        row['notes'] = notes
+    if favorite is not None:
+        row['is_favorite'] = 1 if favorite else 0
+    return row
+
+def _truthy(value):
+    return str(value or "").strip().lower() in ("1", "true", "yes", "y")
+
+class Importer:
+    name = ""
+    extensions = ()
+
+    def detect(self, head):
+        """head is the start of the file as text."""
+        raise NotImplementedError
+
+    def rows(self, filepath):
+        """Yields normalized rows, reading the file incrementally."""
+        raise NotImplementedError
+
+class CsvImporter(Importer):
+    """
+    CSV export with a header row. `columns` maps each of our fields to the
+    header names (lowercased) it may appear under; `required` must all be present.
+    """
+    extensions = (".csv",)
+    required = ()
+    columns = {}
+
+    @staticmethod
+    def _header(head):
+        first_line = head.splitlines()[0] if head else ""
+        return {h.strip().lower() for h in next(csv.reader([first_line]), [])}
+
+    def detect(self, head):
+        return set(self.required) <= self._header(head)
+
+    def rows(self, filepath):
+        with open(filepath, 'r', newline='', encoding='utf-8-sig') as f:
+            reader = csv.reader(f)
+            header = [h.strip().lower() for h in next(reader, [])]
+            index = {}
+            for field, names in self.columns.items():
+                for name in names:
+                    if name in header:
+                        index[field] = header.index(name)
+                        break
+            for record in reader:
+                values = {field: record[i] if i < len(record) else ""
+                          for field, i in index.items()}
+                if self.skip(values):
+                    continue
+                if 'favorite' in values:
+                    values['favorite'] = _truthy(values['favorite'])
+                row = normalize(**values)
+                if row:
+                    yield row
+
+    def skip(self, values):
+        return False
+
+@register_importer
+class OnePasswordCsvImporter(CsvImporter):
+    name = "1Password CSV"
+    required = ("title", "password")
+    columns = {
+        'title': ("title",),
+        'url': ("url", "website", "urls"),
+        'username': ("username",),
+        'password': ("password",),
+        'notes': ("notes", "notesplain"),
+        'favorite': ("favorite",),
+        'archived': ("archived",),
+    }
+
+    def skip(self, values):
+        return _truthy(values.pop('archived', ""))
+
+@register_importer
+class FirefoxCsvImporter(CsvImporter):
+    name = "Firefox CSV"
+    required = ("url", "username", "password", "httprealm")
+    columns = {
+        'url': ("url",),
+        'username': ("username",),
+        'password': ("password",),
+    }
+
+@register_importer
+class ChromeCsvImporter(CsvImporter):
+    # Also Edge, Brave and other Chromium browsers
+    name = "Chrome CSV"
+    required = ("name", "url", "username", "password")
+    columns = {
+        'title': ("name",),
+        'url': ("url",),
+        'username': ("username",),
+        'password': ("password",),
+        'notes': ("note", "notes"),
+    }
+
+@register_importer
+class NativeCsvImporter(CsvImporter):
+    # Our own layout: username,password,website,notes,is_favorite
+    name = "MMPasswd CSV"
+    required = ("password",)
+    columns = {
+        'url': ("website",),
+        'username': ("username",),
+        'password': ("password",),
+        'notes': ("notes",),
+        'favorite': ("is_favorite",),
+    }
+
+class _JsonStream:
+    """
+    Just enough of an incremental JSON reader to walk one large top-level
+    array (json.JSONDecoder.raw_decode over a sliding buffer). Only the
+    value being decoded is ever held in memory.
+    """
+
+    CHUNK = 64 * 1024
+
+    def __init__(self, f):
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        data = self.f.read(self.CHUNK)
+        if not data:
+            self.eof = True
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+
+    def peek(self):
+        """Next non-whitespace character, or "" at end of file."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buf) or self.eof:
+                return self.buf[self.pos:self.pos + 1]
+            self._fill()
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Malformed JSON: expected {char!r}")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                # A number or literal cut off by the buffer end may still parse
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+    def members(self):
+        """Walks the keys of an object, leaving each value for the caller to read."""
+        self.expect("{")
+        while self.peek() != "}":
+            key = self.value()
+            self.expect(":")
+            yield key
+            if self.peek() == ",":
+                self.pos += 1
+        self.expect("}")
+
+    def items(self):
+        """Streams the values of an array."""
+        self.expect("[")
+        while self.peek() != "]":
+            yield self.value()
+            if self.peek() == ",":
+                self.pos += 1
+        self.expect("]")
+
+@register_importer
+class BitwardenJsonImporter(Importer):
+    name = "Bitwarden JSON"
+    extensions = (".json",)
+
+    LOGIN_TYPE = 1
+
+    def detect(self, head):
+        return head.lstrip().startswith("{") and ('"items"' in head or '"encrypted"' in head)
+
+    def rows(self, filepath):
+        with open(filepath, 'r', encoding='utf-8-sig') as f:
+            stream = _JsonStream(f)
+            for key in stream.members():
+                if key != "items":
+                    value = stream.value()
+                    if key == "encrypted" and value:
+                        raise ValueError("Encrypted Bitwarden exports are not supported; export as unencrypted JSON")
+                    continue
+                for item in stream.items():
+                    if item.get("type") != self.LOGIN_TYPE:
+                        continue
+                    login = item.get("login") or {}
+                    uris = login.get("uris") or []
+                    row = normalize(title=item.get("name"),
+                                    url=uris[0].get("uri") if uris else "",
+                                    username=login.get("username"),
+                                    password=login.get("password"),
+                                    notes=item.get("notes") or "",
+                                    favorite=bool(item.get("favorite")))
+                    if row:
+                        yield row
+
+@register_importer
+class KeePassXmlImporter(Importer):
+    # KeePass 2.x "KeePass XML (2.x)" export
+    name = "KeePass XML"
+    extensions = (".xml",)
+
+    def detect(self, head):
+        return "<KeePassFile" in head
+
+    def rows(self, filepath):
+        group_names = []  # names of the groups we are inside
+        history = 0       # >0 while inside an entry's <History> (old versions)
+        tags = []
+        for event, elem in ET.iterparse(filepath, events=("start", "end")):
+            tag = elem.tag
+            if event == "start":
+                tags.append(tag)
+                if tag == "Group":
+                    group_names.append("")
+                elif tag == "History":
+                    history += 1
+                continue
+
+            tags.pop()
+            if tag == "Name" and tags and tags[-1] == "Group":
+                group_names[-1] = elem.text or ""
+            elif tag == "Group":
+                group_names.pop()
+                elem.clear()
+            elif tag == "History":
+                history -= 1
+                elem.clear()
+            elif tag == "Entry" and not history:
+                if "Recycle Bin" not in group_names:
+                    row = self._entry_row(elem)
+                    if row:
+                        yield row
+                elem.clear() # keep memory flat on big files
+
+    @staticmethod
+    def _entry_row(elem):
+        fields = {}
+        for string in elem.findall("String"):
+            fields[string.findtext("Key", "")] = string.findtext("Value", "")
+        entry_tags = (elem.findtext("Tags", "") or "").replace(",", ";").split(";")
+        return normalize(title=fields.get("Title"),
+                         url=fields.get("URL"),
+                         username=fields.get("UserName"),
+                         password=fields.get("Password"),
+                         notes=fields.get("Notes") or "",
+                         favorite="favorite" in (t.strip().lower() for t in entry_tags))
 
 class ImportExportManager:
     # EXPORT REMOVED FOR SECURITY
-    
+
+    # Rows parsed and inserted per step; progress and cancellation are checked in between
+    CHUNK_ROWS = 1000
+
+    @staticmethod
+    def import_csv(kdbx_manager, filepath, progress=None, cancel=None, policy="skip"):
+        """Imports our own CSV layout (see import_file())."""
+        importer = next(i for i in IMPORTERS if isinstance(i, NativeCsvImporter))
+        return ImportExportManager.import_file(kdbx_manager, filepath, progress, cancel, importer, policy)
+
     @staticmethod
-    def import_csv(kdbx_manager, filepath):
+    def import_file(kdbx_manager, filepath, progress=None, cancel=None, importer=None, policy="skip"):
+        """
+        Streams an export into the vault as one transaction and returns a
+        MergeResult. The format is detected unless an importer is given.
+
+        Rows already in the vault are found through its duplicate index and
+        handled according to policy ("skip", "overwrite" or "keep", see
+        KeePassDatabaseManager.merge_entries()), so importing the same file
+        twice changes nothing.
+
+        Rows are read and merged CHUNK_ROWS at a time inside a single batch,
+        so the vault is saved once at the end. progress(rows, rows_per_sec) is
+        called after every chunk (from the calling thread). If the `cancel`
+        event gets set, or a row fails, everything this import changed is
+        put back; cancelling raises ImportCancelled.
+        """
+        if importer is None:
+            importer = detect_importer(filepath)
+            if importer is None:
+                raise ValueError("Unrecognized file format")
+
         count = 0
-        with open(filepath, 'r', newline='', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                # Basic validation
-                if 'password' not in row:
-                    continue
-                    
-                kdbx_manager.add_entry({
-                    'username': row.get('username', ''),
-                    'password': row.get('password', ''),
-                    'website': row.get('website', ''),
-                    'notes': row.get('notes', ''),
-                    'is_favorite': int(row.get('is_favorite', 0))
-                })
-                count += 1
-        return count
+        result = MergeResult()
+        started = time.perf_counter()
+        rows = importer.rows(filepath)
+        with kdbx_manager.batch():
+            try:
+                while True:
+                    if cancel is not None and cancel.is_set():
+                        raise ImportCancelled()
+                    chunk = list(islice(rows, ImportExportManager.CHUNK_ROWS))
+                    if not chunk:
+                        break
+                    kdbx_manager.merge_entries(chunk, policy, result)
+                    count += len(chunk)
+
+                    if progress:
+                        elapsed = time.perf_counter() - started
+                        progress(count, count / elapsed if elapsed else 0.0)
+            except BaseException:
+                # All or nothing: the batch hasn't written anything yet
+                kdbx_manager.revert_merge(result)
+                raise
+            finally:
+                rows.close() # releases the source file
+        return result
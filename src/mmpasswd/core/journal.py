@@ -0,0 +1,136 @@
+import os
+import json
+import base64
+from cryptography.fernet import InvalidToken
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from .security import SecurityManager
+
+class ChangeJournal:
+    """
+    Encrypted append-only log of vault edits, kept next to vault.kdbx.
+
+    Each line is one Fernet token holding a JSON list of operations
+    (see KeePassDatabaseManager._apply_op). The key is derived with HKDF from
+    the vault's transformed key (the KDF output) and the salt on the header
+    line, so checking a password guess against the journal costs as much as
+    against the vault itself. The journal is replayed on unlock and trimmed
+    whenever the full KDBX file is rewritten.
+    """
+
+    MAGIC = b"MMPJ2"
+
+    def __init__(self, path, transformed_key):
+        self.path = path
+        self._security = None
+        self.size = 0
+        self.records = 0   # records appended so far, including dropped ones
+        self._dropped = 0  # records no longer in the file (see discard_through())
+
+        self._salt = self._read_salt()
+        if self._salt is None:
+            self.rekey(transformed_key)
+        else:
+            self._security = SecurityManager(key=self._derive_key(transformed_key, self._salt))
+            self.size = os.path.getsize(self.path)
+
+    @staticmethod
+    def _derive_key(transformed_key, salt):
+        hkdf = HKDF(algorithm=hashes.SHA256(), length=32, salt=salt, info=b"mmpasswd journal")
+        return base64.urlsafe_b64encode(hkdf.derive(transformed_key))
+
+    def _read_salt(self):
+        try:
+            with open(self.path, 'rb') as f:
+                header = f.readline()
+        except FileNotFoundError:
+            return None
+        parts = header.strip().split(b" ")
+        if len(parts) != 2 or parts[0] != self.MAGIC:
+            return None
+        try:
+            return base64.b64decode(parts[1])
+        except ValueError:
+            return None
+
+    def _start(self):
+        header = self.MAGIC + b" " + base64.b64encode(self._salt) + b"\n"
+        with open(self.path, 'wb') as f:
+            f.write(header)
+            f.flush()
+            os.fsync(f.fileno())
+        self.size = len(header)
+
+    def replay(self):
+        """Returns every operation that can still be decrypted, in order."""
+        ops = []
+        good_end = 0
+        with open(self.path, 'rb') as f:
+            f.readline() # header
+            good_end = f.tell()
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break # torn write at the tail
+                good_end += len(line)
+                self.records += 1
+                try:
+                    ops.extend(json.loads(self._security.cipher.decrypt(line.strip())))
+                except (InvalidToken, ValueError):
+                    continue
+
+        # Drop a partial last line so the next append starts cleanly
+        if good_end < os.path.getsize(self.path):
+            with open(self.path, 'r+b') as f:
+                f.truncate(good_end)
+        self.size = good_end
+        return ops
+
+    def append(self, ops):
+        """Durably appends a group of operations as one record."""
+        token = self._security.cipher.encrypt(json.dumps(ops).encode())
+        with open(self.path, 'ab') as f:
+            f.write(token + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.size += len(token) + 1
+        self.records += 1
+
+    def reset(self):
+        """Empties the journal once its contents are in the KDBX file."""
+        self._start()
+        self._dropped = self.records
+
+    def rekey(self, transformed_key):
+        """Starts over, empty, under a new key and salt (after the vault is re-keyed)."""
+        self._salt = SecurityManager.generate_salt()
+        self._security = SecurityManager(key=self._derive_key(transformed_key, self._salt))
+        self.reset()
+
+    def discard_through(self, checkpoint):
+        """
+        Drops the records appended before checkpoint (a value of self.records),
+        keeping any that arrived after it. Used once a KDBX save taken at the
+        checkpoint is on disk.
+        """
+        count = checkpoint - self._dropped
+        if count <= 0: return
+        if checkpoint >= self.records:
+            self.reset()
+            return
+        with open(self.path, 'rb') as f:
+            header = f.readline()
+            for _ in range(count):
+                f.readline()
+            tail = f.read()
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(header + tail)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self.size = len(header) + len(tail)
+        self._dropped = checkpoint
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
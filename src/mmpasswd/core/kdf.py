@@ -0,0 +1,164 @@
+import os
+import time
+import argon2.low_level
+from pykeepass.kdbx_parsing.common import aes_kdf, compute_key_composite
+from pykeepass.kdbx_parsing.kdbx4 import kdf_uuids
+
+# KDF tuning for KDBX vaults.
+# Parameters are plain dicts:
+#   {"algorithm": "argon2" | "argon2id", "iterations": int, "memory_kib": int, "parallelism": int}
+#   {"algorithm": "aeskdf", "rounds": int}
+
+DEFAULT_TARGET_SECONDS = 1.0
+DEFAULT_MEMORY_KIB = 64 * 1024
+MIN_MEMORY_KIB = 8 * 1024
+MAX_ITERATIONS = 1000
+
+_BENCH_SECRET = b"\x00" * 32
+_BENCH_SALT = b"\x00" * 32
+
+def _argon2_type(algorithm):
+    return argon2.low_level.Type.ID if algorithm == "argon2id" else argon2.low_level.Type.D
+
+def _kdbx4_parameters(kp):
+    return kp.kdbx.header.value.dynamic_header.kdf_parameters.data.dict
+
+def read_parameters(kp):
+    """Returns the KDF parameters of an open PyKeePass database."""
+    if kp.version < (4, 0):
+        return {"algorithm": "aeskdf",
+                "rounds": kp.kdbx.header.value.dynamic_header.transform_rounds.data}
+
+    params = _kdbx4_parameters(kp)
+    algorithm = kp.kdf_algorithm
+    if algorithm == "aeskdf":
+        return {"algorithm": algorithm, "rounds": params['R'].value}
+    return {
+        "algorithm": algorithm,
+        "iterations": params['I'].value,
+        "memory_kib": params['M'].value // 1024,
+        "parallelism": params['P'].value,
+    }
+
+def read_salt(kp):
+    if kp.version < (4, 0):
+        return kp.kdbx.header.value.dynamic_header.transform_seed.data
+    return _kdbx4_parameters(kp)['S'].value
+
+def new_salt(kp):
+    """A fresh random KDF salt of the vault's salt size."""
+    return os.urandom(len(read_salt(kp)))
+
+def check_parameters(kp, new_params):
+    """
+    Raises ValueError unless the vault can switch to new_params. Switching
+    between Argon2 variants is supported; switching between Argon2 and
+    AES-KDF is not (the header layout differs).
+    """
+    current = read_parameters(kp)
+    if (current["algorithm"] == "aeskdf") != (new_params["algorithm"] == "aeskdf"):
+        raise ValueError("Cannot switch between AES-KDF and Argon2 on an existing vault")
+
+def apply_parameters(kp, new_params, salt=None):
+    """Writes KDF parameters into the header with a new salt (random unless given)."""
+    check_parameters(kp, new_params)
+    if salt is None:
+        salt = new_salt(kp)
+
+    header = kp.kdbx.header.value.dynamic_header
+    if kp.version < (4, 0):
+        header.transform_rounds.data = int(new_params["rounds"])
+        header.transform_seed.data = salt
+        return
+
+    params = _kdbx4_parameters(kp)
+    if new_params["algorithm"] == "aeskdf":
+        params['R'].value = int(new_params["rounds"])
+    else:
+        params['$UUID'].value = kdf_uuids[new_params["algorithm"]]
+        params['I'].value = int(new_params["iterations"])
+        params['M'].value = int(new_params["memory_kib"]) * 1024
+        params['P'].value = int(new_params["parallelism"])
+    params['S'].value = salt
+
+def derive_transformed_key(kp, params=None, salt=None):
+    """
+    Runs the vault's KDF, giving the key pykeepass accepts as transformed_key.
+    With params and salt, runs it for those instead of the header's, so a
+    re-key can be prepared without touching the vault.
+    """
+    composite = compute_key_composite(password=kp.password, keyfile=kp.keyfile)
+    if params is None:
+        params, salt = read_parameters(kp), read_salt(kp)
+    if params["algorithm"] == "aeskdf":
+        return aes_kdf(salt, int(params["rounds"]), composite)
+    return argon2.low_level.hash_secret_raw(
+        secret=composite,
+        salt=salt,
+        hash_len=32,
+        type=_argon2_type(params["algorithm"]),
+        time_cost=int(params["iterations"]),
+        memory_cost=int(params["memory_kib"]),
+        parallelism=int(params["parallelism"]),
+        version=_kdbx4_parameters(kp)['V'].value
+    )
+
+def benchmark(params):
+    """Seconds one key derivation with these parameters takes on this machine."""
+    start = time.perf_counter()
+    if params["algorithm"] == "aeskdf":
+        aes_kdf(_BENCH_SALT, int(params["rounds"]), _BENCH_SECRET)
+    else:
+        argon2.low_level.hash_secret_raw(
+            secret=_BENCH_SECRET,
+            salt=_BENCH_SALT,
+            hash_len=32,
+            type=_argon2_type(params["algorithm"]),
+            time_cost=int(params["iterations"]),
+            memory_cost=int(params["memory_kib"]),
+            parallelism=int(params["parallelism"]),
+        )
+    return time.perf_counter() - start
+
+def calibrate(target_seconds=DEFAULT_TARGET_SECONDS, algorithm="argon2id",
+              memory_kib=DEFAULT_MEMORY_KIB, parallelism=None):
+    """
+    Picks KDF parameters so an unlock takes about target_seconds here.
+    Returns the parameters plus the measured "seconds".
+    """
+    if algorithm == "aeskdf":
+        probe = {"algorithm": algorithm, "rounds": 100000}
+        elapsed = benchmark(probe)
+        rounds = max(100000, int(probe["rounds"] * target_seconds / max(elapsed, 1e-6)))
+        result = {"algorithm": algorithm, "rounds": rounds}
+        result["seconds"] = benchmark(result)
+        return result
+
+    params = {
+        "algorithm": algorithm,
+        "iterations": 1,
+        "memory_kib": memory_kib,
+        "parallelism": parallelism or min(os.cpu_count() or 1, 4),
+    }
+    # Give up memory before going below a single pass
+    elapsed = benchmark(params)
+    while elapsed > target_seconds and params["memory_kib"] > MIN_MEMORY_KIB:
+        params["memory_kib"] //= 2
+        elapsed = benchmark(params)
+
+    # Time grows roughly linearly with iterations; refine once after scaling
+    for _ in range(2):
+        scaled = params["iterations"] * target_seconds / max(elapsed, 1e-6)
+        params["iterations"] = max(1, min(MAX_ITERATIONS, int(round(scaled))))
+        elapsed = benchmark(params)
+
+    params["seconds"] = elapsed
+    return params
+
+def describe(params):
+    """Short human-readable summary for the settings view."""
+    if params["algorithm"] == "aeskdf":
+        return f"AES-KDF, {params['rounds']:,} rounds"
+    name = "Argon2id" if params["algorithm"] == "argon2id" else "Argon2d"
+    return (f"{name}, {params['memory_kib'] // 1024} MiB, "
+            f"{params['iterations']} iterations, {params['parallelism']} lanes")
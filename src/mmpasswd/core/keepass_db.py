@@ -1,11 +1,131 @@
 import os
+import io
 import shutil
 from pykeepass import PyKeePass
+from pykeepass.entry import Entry
 from pykeepass.exceptions import CredentialsError
-from datetime import datetime
+from datetime import datetime, timezone
 import uuid
+import threading
+import functools
+from contextlib import contextmanager
+from .save_worker import SaveWorker
+from .journal import ChangeJournal
+from . import kdf
+from .search_index import SearchIndex
+from .duplicate_index import DuplicateIndex
+from . import fuzzy
+
+class VaultBusy(RuntimeError):
+    """A write from the interactive thread was refused while another thread's batch is open."""
+
+def _synchronized(method):
+    """Serializes access to the KDBX tree between the UI and the save thread."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+def _writer(method):
+    """Like _synchronized, but first waits for a batch open on another thread to end."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            self._wait_for_batch()
+            return method(self, *args, **kwargs)
+    return wrapper
+
+def sort_key_for(website, username):
+    """The key entry lists are ordered by: website, else username, case-folded."""
+    return (website or username or "").lower()
+
+class EntryRecord:
+    """
+    Flat, read-only snapshot of an entry's listing fields, cached by the manager.
+    Password and notes are deliberately left out; they are read on demand.
+    """
+    __slots__ = ('id', 'title', 'username', 'website',
+                 'is_favorite', 'created_date', 'sort_key')
+
+    def __init__(self, entry):
+        self.id = str(entry.uuid)
+        self.title = entry.title or ""
+        self.username = entry.username or ""
+        self.website = entry.url or ""
+        self.is_favorite = 1 if entry.tags and 'favorite' in entry.tags else 0
+        self.created_date = getattr(entry, 'ctime', datetime.now()).isoformat()
+        self.sort_key = sort_key_for(self.website, self.username)
+
+    @classmethod
+    def from_fields(cls, entry_id, title, username, website, is_favorite, created):
+        """Builds a record from values already at hand, skipping the XML reads."""
+        record = cls.__new__(cls)
+        record.id = entry_id
+        record.title = title or ""
+        record.username = username or ""
+        record.website = website or ""
+        record.is_favorite = is_favorite
+        record.created_date = created.isoformat()
+        record.sort_key = sort_key_for(record.website, record.username)
+        return record
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "username": self.username,
+            "website": self.website,
+            "is_favorite": self.is_favorite,
+            "created_date": self.created_date
+        }
+
+class EntryChange:
+    """
+    One entry mutation, as seen by listeners (see add_listener()).
+
+    kind is "added", "updated", "moved" (into or out of the Recycle Bin) or
+    "removed"; "reset" means too much changed to describe entry by entry.
+    entry is the listing dict (no secrets) and views the set of views
+    ('all', 'favorites', 'deleted') the entry now shows up in.
+    """
+    __slots__ = ('kind', 'id', 'entry', 'views')
+
+    def __init__(self, kind, entry_id=None, entry=None, views=frozenset()):
+        self.kind = kind
+        self.id = entry_id
+        self.entry = entry
+        self.views = views
+
+class MergeResult:
+    """
+    What merge_entries() did, by entry id: enough to report on an import
+    and, inside its batch, to take it back again (see revert_merge()).
+    """
+    __slots__ = ('added', 'overwritten', 'skipped')
+
+    def __init__(self):
+        self.added = []        # ids of new entries
+        self.overwritten = {}  # id -> the entry's fields before it was overwritten
+        self.skipped = 0       # rows already in the vault (or conflicts, under "skip")
 
 class KeePassDatabaseManager:
+    # Previous versions kept next to the vault as vault.kdbx.1 (newest) .. .N
+    BACKUP_GENERATIONS = 3
+    # Single edits go to the change journal; the KDBX is rewritten once the
+    # journal grows past this size, or on lock/exit (see flush())
+    JOURNAL_COMPACT_BYTES = 256 * 1024
+    # Batches with more operations than this skip the journal and save in full
+    JOURNAL_BATCH_LIMIT = 100
+    # Batches that change more entries than this notify listeners with a
+    # single "reset" instead of one event per entry
+    CHANGE_EVENT_LIMIT = 100
+    # What merge_entries() does with a row whose site and username exist with
+    # another password: leave the vault as is, replace it, or add the row too
+    DUPLICATE_POLICIES = ("skip", "overwrite", "keep")
+    # Results of background checks (see set_flags()), each also a view
+    FLAGS = ("compromised", "audit")
+    VIEWS = ("all", "favorites", "deleted", "duplicates") + FLAGS
+
     def __init__(self, db_path=None, password=None, keyfile=None):
         import sys
         if db_path is None:
@@ -22,7 +142,52 @@ class KeePassDatabaseManager:
 
         self._kp = None
         self._password = password
-        
+
+        # In-memory index so lookups don't re-scan the KDBX tree
+        self._entries = {}        # entry id -> Entry
+        self._entry_group = {}    # entry id -> group id
+        self._group_members = {}  # group id -> set of entry ids
+        self._records = {}        # entry id -> EntryRecord
+        self._entry_keys = {}     # (group id, title, username) -> count, for duplicate checks
+        self._search_index = SearchIndex() # website/username/title n-grams
+        self._duplicates = DuplicateIndex() # active entries by (host, username)
+        self._recycled_groups = set()  # ids of "Recycle Bin" and its subgroups
+        self._root_group_id = None
+        self._active_ids = set()
+        self._deleted_ids = set()
+        # Results of background checks (see set_flags()); each flag is also a view
+        self._flags = {}          # flag -> {entry id: detail}
+
+        # Batched writes (see batch()); the state belongs to the owning thread
+        self._batch_owner = None        # thread ident of the open batch
+        self._interactive_thread = None # see set_interactive_thread()
+        self._batch_depth = 0
+        self._dirty = False             # tree has changes the KDBX file doesn't
+        self._compact_requested = False # a full save was asked for inside a batch
+        self._pending_ops = []          # journal operations held by an open batch
+        self._pending_changes = []      # change events held by an open batch
+
+        # Settings, read once at unlock (see get_config())
+        self._config = {}          # key -> value (str)
+        self._config_entry = None  # the 'MMPasswd_Config' entry holding them
+        self._pending_config = {}  # changed settings not yet in the journal or KDBX
+
+        # Change listeners (see add_listener())
+        self._listeners = []
+
+        # Change journal (see _commit())
+        self._journal = None
+
+        # Background saves (see start_background_saves())
+        self._lock = threading.RLock()
+        self._batch_closed = threading.Condition(self._lock)
+        self._save_lock = threading.Lock() # file writes (see _write())
+        self._save_seq = 0   # snapshots serialized
+        self._saved_seq = 0  # newest snapshot on disk
+        self._save_worker = None
+        self.last_save_error = None
+        self._transformed_key = None  # cached KDF output, reused on save
+
         # Initialize or Load
         if password:
             self.load_database(password)
@@ -30,150 +195,857 @@ class KeePassDatabaseManager:
     def is_setup(self):
         return os.path.exists(self.db_path)
 
-    def create_database(self, password):
-        """Creates a new KDBX database."""
+    @_writer
+    def create_database(self, password, kdf_params=None):
+        """Creates a new KDBX database, optionally with tuned KDF parameters (see kdf.calibrate)."""
         from pykeepass import create_database
-        self._kp = create_database(self.db_path, password=password)
-        self._kp.save()
+        # Build in memory, then write through the atomic path so an existing
+        # vault being overwritten is rotated into the backups, not clobbered.
+        self._kp = create_database(io.BytesIO(), password=password)
+        self._kp.filename = self.db_path
         self._password = password
+        if kdf_params:
+            kdf.apply_parameters(self._kp, kdf_params)
+        # The key cached by pykeepass belongs to its blank template, not us
+        self._transformed_key = kdf.derive_transformed_key(self._kp)
+        self._build_index()
+        # A journal left behind by a previous vault must not be replayed on this one
+        self._journal = ChangeJournal(self._journal_path(), self._transformed_key)
+        self._journal.rekey(self._transformed_key)
+        self._write()
 
+    @_synchronized
     def load_database(self, password):
         """Loads an existing KDBX database."""
         try:
             self._kp = PyKeePass(self.db_path, password=password)
             self._password = password
+            self._transformed_key = self._kp.transformed_key
+            self._build_index()
+            self._replay_journal()
             return True
         except CredentialsError:
             return False
         except FileNotFoundError:
             return False
 
+    # --- Key Derivation ---
+
+    @_synchronized
+    def get_kdf_parameters(self):
+        if not self._kp: return None
+        return kdf.read_parameters(self._kp)
+
+    def set_kdf_parameters(self, params):
+        """
+        Re-keys the vault with new KDF parameters and rewrites it immediately.
+        The KDF runs outside the lock, so the vault stays usable meanwhile;
+        only the header and key swap and the save hold it.
+        """
+        with self._lock:
+            self._wait_for_batch()
+            kp = self._kp
+            if not kp: return
+            kdf.check_parameters(kp, params)
+            salt = kdf.new_salt(kp)
+        key = kdf.derive_transformed_key(kp, params, salt)
+
+        with self._lock:
+            self._wait_for_batch()
+            if self._kp is not kp: return # locked or replaced meanwhile
+            previous, previous_salt = kdf.read_parameters(kp), kdf.read_salt(kp)
+            previous_key = self._transformed_key
+            kdf.apply_parameters(kp, params, salt)
+            self._transformed_key = key
+            try:
+                self._write()
+            except Exception:
+                # Put the old header back so later saves still match the old key
+                kdf.apply_parameters(kp, previous, previous_salt)
+                self._transformed_key = previous_key
+                raise
+            # Everything is in the file now; later edits use the new key
+            if self._journal:
+                self._journal.rekey(key)
+
+    def _journal_path(self):
+        return self.db_path + ".journal"
+
+    def _replay_journal(self):
+        self._journal = ChangeJournal(self._journal_path(), self._transformed_key)
+        ops = self._journal.replay()
+        for op in ops:
+            try:
+                self._apply_op(op)
+            except Exception:
+                # Replay is best-effort; ops already in the KDBX may not apply
+                continue
+        # Replayed edits are only in the journal until the next full save
+        self._dirty = bool(ops)
+
+    @_writer
     def save(self):
-        if self._kp:
-            self._kp.save()
+        """Writes the whole KDBX file (compacting the journal)."""
+        if not self._kp: return
+        if self._batch_depth:
+            # Deferred until the outermost batch() exits
+            self._dirty = True
+            self._compact_requested = True
+            return
+        if self._save_worker:
+            self._dirty = True
+            self._save_worker.mark_dirty()
+            return
+        self._write()
+
+    def _write(self):
+        """
+        Serializes the vault and atomically replaces the file on disk.
+
+        Only serializing needs the manager lock; the file write, fsync and
+        rename happen under _save_lock so edits aren't held up behind the
+        disk. Journal records that arrive meanwhile are kept for the next save.
+        """
+        with self._lock:
+            # Never save an import or rotation half way through
+            self._wait_for_batch()
+            if not self._kp: return
+            buffer = io.BytesIO()
+            # Reusing the transformed key skips the KDF, the slowest part of a save
+            self._kp.save(buffer, transformed_key=self._transformed_key)
+            self._save_seq += 1
+            seq = self._save_seq
+            journal = self._journal
+            checkpoint = journal.records if journal else 0
+            config, self._pending_config = self._pending_config, {} # the tree already holds them
+            self._dirty = False
+
+        try:
+            with self._save_lock:
+                # A newer snapshot may have reached the disk first
+                if seq > self._saved_seq:
+                    self._atomic_replace(buffer.getvalue())
+                    self._saved_seq = seq
+        except Exception:
+            with self._lock:
+                self._dirty = True
+                self._pending_config = {**config, **self._pending_config}
+            raise
+
+        with self._lock:
+            if journal and journal is self._journal:
+                journal.discard_through(checkpoint)
+
+    def _commit(self, op):
+        """Records a mutation: appended to the journal, or a full save without one."""
+        self._dirty = True
+        if self._batch_depth:
+            self._pending_ops.append(op)
+            return
+        self._append_journal([op])
+
+    def _append_journal(self, ops):
+        # Settings changed since the last write ride along with the edit
+        if self._pending_config:
+            ops = [{"op": "config", "key": k, "value": v}
+                   for k, v in self._pending_config.items()] + list(ops)
+            self._pending_config = {}
+        if not ops: return
+        if not self._journal:
+            self.save()
+            return
+        try:
+            self._journal.append(ops)
+        except OSError:
+            # Fall back to a full save rather than lose the edit
+            self.save()
+            return
+        if self._journal.size > self.JOURNAL_COMPACT_BYTES:
+            self.save()
+
+    def _atomic_replace(self, data):
+        """Write-to-temp + fsync + rename, keeping BACKUP_GENERATIONS old copies."""
+        tmp_path = self.db_path + ".tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        if os.path.exists(self.db_path) and self.BACKUP_GENERATIONS > 0:
+            self._rotate_backups()
+
+        os.replace(tmp_path, self.db_path)
+        self._fsync_dir()
+
+    def _rotate_backups(self):
+        # vault.kdbx.N-1 -> .N, ..., .1 -> .2, then current -> .1
+        for i in range(self.BACKUP_GENERATIONS - 1, 0, -1):
+            src = f"{self.db_path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.db_path}.{i + 1}")
+        newest = self.db_path + ".1"
+        try:
+            # A hard link keeps the old bytes without copying them
+            if os.path.exists(newest):
+                os.remove(newest)
+            os.link(self.db_path, newest)
+        except OSError:
+            shutil.copy2(self.db_path, newest)
+
+    def _fsync_dir(self):
+        if os.name != 'posix': return
+        fd = os.open(os.path.dirname(os.path.abspath(self.db_path)), os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def start_background_saves(self, on_status=None, delay=0.5):
+        """Moves saves onto a coalescing writer thread (see SaveWorker)."""
+        if self._save_worker: return
+        self._save_worker = SaveWorker(self._write, delay=delay, on_status=on_status)
+        if self._dirty:
+            self._save_worker.mark_dirty()
+
+    def stop_background_saves(self, timeout=None):
+        """
+        Flushes pending changes and returns to synchronous saves. Returns True
+        on success. Waits for a batch open on another thread to finish first.
+        """
+        with self._lock:
+            if self._batch_owner == threading.get_ident():
+                raise RuntimeError("stop_background_saves() can't be called inside batch()")
+            self._wait_for_batch()
+            self._flush_config()
+            worker, self._save_worker = self._save_worker, None
+            if not worker: return True
+            if self._dirty:
+                worker.mark_dirty() # compact the journal into the KDBX
+        ok = worker.stop(timeout)
+        self.last_save_error = worker.last_error
+        return ok
+
+    def flush(self, timeout=None):
+        """
+        Writes any pending changes now. Returns True if the vault is up to
+        date. A batch open on another thread is waited for; inside a batch
+        nothing is written (the batch saves when it ends).
+        """
+        with self._lock:
+            self._wait_for_batch()
+            if self._batch_depth:
+                return not self._dirty
+            self._flush_config()
+            worker = self._save_worker
+            if not worker:
+                if self._dirty:
+                    self._write()
+                return True
+            if self._dirty:
+                worker.mark_dirty()
+        ok = worker.flush(timeout)
+        self.last_save_error = worker.last_error
+        return ok
+
+    def set_interactive_thread(self):
+        """
+        Marks the calling thread (the UI's) as one that must never block
+        behind a batch: its writes raise VaultBusy while an import or other
+        batch runs on another thread, instead of waiting for it to finish.
+        """
+        self._interactive_thread = threading.get_ident()
+
+    def _wait_for_batch(self):
+        # Called with the lock held; waiting releases it so the batch can go on
+        me = threading.get_ident()
+        while self._batch_owner not in (None, me):
+            if me == self._interactive_thread:
+                raise VaultBusy("An import or password rotation is still running")
+            self._batch_closed.wait()
+
+    @contextmanager
+    def batch(self):
+        """
+        Groups several mutations into a single save:
+
+            with manager.batch():
+                manager.add_entry(...)
+                manager.add_entry(...)
+
+        Batches nest; only the outermost one writes the vault. A batch belongs
+        to the thread that opened it: writes from other threads wait until it
+        ends instead of joining it. If the block raises, whatever it didn't
+        take back (see discard_entries()) is still journaled.
+        """
+        with self._lock:
+            self._wait_for_batch()
+            self._batch_owner = threading.get_ident()
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if not self._batch_depth:
+                    try:
+                        self._close_batch()
+                    finally:
+                        self._batch_owner = None
+                        self._batch_closed.notify_all()
+
+    def _close_batch(self):
+        # The in-memory tree changed either way, so listeners hear about it
+        changes, self._pending_changes = self._pending_changes, []
+        self._dispatch(changes)
+
+        ops, self._pending_ops = self._pending_ops, []
+        compact, self._compact_requested = self._compact_requested, False
+        if compact or len(ops) > self.JOURNAL_BATCH_LIMIT:
+            self.save()
+        elif ops:
+            self._append_journal(ops)
+
+    # --- Change events ---
+
+    def add_listener(self, callback):
+        """
+        Calls callback(EntryChange) after each add/update/delete/restore, on
+        the thread that made the change. Inside a batch the events are held
+        until it ends; big batches are reported as a single "reset".
+        """
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self, kind, entry_id):
+        record = self._records.get(entry_id)
+        change = EntryChange(kind, entry_id,
+                             record.to_dict() if record else None,
+                             self._views_of(record))
+        if self._batch_depth:
+            self._pending_changes.append(change)
+        else:
+            self._dispatch([change])
+
+    def _dispatch(self, changes):
+        if not changes or not self._listeners: return
+        if len(changes) > self.CHANGE_EVENT_LIMIT:
+            changes = [EntryChange("reset")]
+        for change in changes:
+            for listener in list(self._listeners):
+                listener(change)
+
+    def _views_of(self, record):
+        if not record or record.title == "MMPasswd_Config":
+            return frozenset()
+        if record.id in self._deleted_ids:
+            return frozenset(('deleted',))
+        return frozenset(('all', 'favorites') if record.is_favorite else ('all',))
+
+    # --- Index ---
+
+    def _build_index(self):
+        """Walks the tree once and indexes every entry by UUID."""
+        self._entries = {}
+        self._entry_group = {}
+        self._group_members = {}
+        self._records = {}
+        self._entry_keys = {}
+        self._search_index = SearchIndex()
+        self._duplicates = DuplicateIndex()
+        self._recycled_groups = set()
+        self._active_ids = set()
+        self._deleted_ids = set()
+        self._flags = {}
+        self._root_group_id = None
+        self._config = {}
+        self._config_entry = None
+        self._pending_config = {}
+        if not self._kp: return
+        root = self._kp.root_group
+        self._root_group_id = str(root.uuid)
+        self._mark_recycled_groups(root, False)
+        for group in self._kp.groups:
+            group_id = str(group.uuid)
+            # Group.name is an XML lookup; read it once per group, not per entry
+            is_meta = group.name == "Meta"
+            for entry in group.entries:
+                record = self._index_entry(entry, group_id)
+                if is_meta and self._config_entry is None and record.title == "MMPasswd_Config":
+                    self._config_entry = entry
+        if self._config_entry is not None:
+            self._config = dict(self._config_entry.custom_properties)
+
+    def _mark_recycled_groups(self, group, in_bin):
+        in_bin = in_bin or group.name == "Recycle Bin"
+        if in_bin:
+            self._recycled_groups.add(str(group.uuid))
+        for sub in group.subgroups:
+            self._mark_recycled_groups(sub, in_bin)
+
+    def _index_entry(self, entry, group_id=None, record=None):
+        """
+        (Re)indexes an entry; call after any mutation that touches it.
+        Pass group_id when it's known: Group.uuid scans all of the group's
+        children, which adds up in a group of thousands of entries.
+        """
+        entry_id = record.id if record else str(entry.uuid)
+        if group_id is None:
+            group_id = str(entry.group.uuid)
+        self._unindex_entry(entry_id)
+        self._entries[entry_id] = entry
+        record = self._records[entry_id] = record or EntryRecord(entry)
+        self._search_index.add(entry_id, record.website, record.username, record.title)
+        self._entry_group[entry_id] = group_id
+        self._group_members.setdefault(group_id, set()).add(entry_id)
+        key = (group_id, record.title, record.username)
+        self._entry_keys[key] = self._entry_keys.get(key, 0) + 1
+        if group_id in self._recycled_groups:
+            self._deleted_ids.add(entry_id)
+        else:
+            self._active_ids.add(entry_id)
+            if record.title != "MMPasswd_Config":
+                self._duplicates.add(entry_id, record.website, record.username)
+        return record
+
+    def _unindex_entry(self, entry_id):
+        self._entries.pop(entry_id, None)
+        record = self._records.pop(entry_id, None)
+        self._search_index.remove(entry_id)
+        self._duplicates.remove(entry_id)
+        for flagged in self._flags.values():
+            flagged.pop(entry_id, None)
+        self._active_ids.discard(entry_id)
+        self._deleted_ids.discard(entry_id)
+        group_id = self._entry_group.pop(entry_id, None)
+        if group_id is not None:
+            members = self._group_members.get(group_id)
+            if members is not None:
+                members.discard(entry_id)
+                if not members:
+                    del self._group_members[group_id]
+            key = (group_id, record.title, record.username)
+            if self._entry_keys.get(key, 0) > 1:
+                self._entry_keys[key] -= 1
+            else:
+                self._entry_keys.pop(key, None)
+
+    @staticmethod
+    def _normalize_id(entry_id):
+        try:
+            return str(uuid.UUID(str(entry_id)))
+        except ValueError:
+            return None
+
+    def _find_entry(self, entry_id):
+        return self._entries.get(self._normalize_id(entry_id))
+
+    def _find_record(self, entry_id):
+        return self._records.get(self._normalize_id(entry_id))
 
     # --- Configuration Persistence ---
+    @_writer
     def set_config(self, key, value):
+        """
+        Changes a setting. It is written along with the next entry edit or
+        save (or on flush()/lock), so it never costs a vault rewrite by itself.
+        """
         if not self._kp: return
+        value = str(value)
+        if self._config.get(key) == value: return
+        self._apply_config(key, value)
+        self._pending_config[key] = value
+
+    def _flush_config(self):
+        """Journals settings nothing else has written yet."""
+        with self._lock:
+            if self._pending_config and not self._batch_depth:
+                self._append_journal([])
+
+    def _apply_config(self, key, value):
         # Store in a special entry named 'MMPasswd_Config' in 'Meta' group
-        meta_group = self._kp.find_groups(name="Meta", first=True)
-        if not meta_group:
-            meta_group = self._kp.add_group(self._kp.root_group, "Meta")
-            
-        config_entry = self._kp.find_entries(title="MMPasswd_Config", group=meta_group, first=True)
-        if not config_entry:
-            config_entry = self._kp.add_entry(meta_group, "MMPasswd_Config", "", "")
-            
+        if self._config_entry is None:
+            meta_group = self._kp.find_groups(name="Meta", first=True)
+            if not meta_group:
+                meta_group = self._kp.add_group(self._kp.root_group, "Meta")
+            self._config_entry = self._kp.find_entries(title="MMPasswd_Config", group=meta_group, first=True)
+            if not self._config_entry:
+                self._config_entry = self._kp.add_entry(meta_group, "MMPasswd_Config", "", "")
+                # Indexed like any entry, so moves and key checks see it
+                self._index_entry(self._config_entry, str(meta_group.uuid))
+
         # We use custom properties (string fields)
-        # Fix: Use set_custom_property method
-        config_entry.set_custom_property(key, str(value))
-        
-        self.save()
+        self._config_entry.set_custom_property(key, value)
+        self._config[key] = value
         
     def get_config(self, key, default=None):
-        if not self._kp: return default
-        meta_group = self._kp.find_groups(name="Meta", first=True)
-        if not meta_group: return default
-        
-        config_entry = self._kp.find_entries(title="MMPasswd_Config", group=meta_group, first=True)
-        if not config_entry: return default
-        
-        val = config_entry.get_custom_property(key)
-        return val if val is not None else default
+        # Served from memory; the entry is only read at unlock
+        return self._config.get(key, default)
 
     # --- Entry Management ---
     
-    def _entry_to_dict(self, entry):
-        if not entry: return None
-        return {
-            "id": str(entry.uuid),
-            "username": entry.username or "",
-            "password": entry.password or "", # KeePass handles encryption
-            "website": entry.url or "",
-            "notes": entry.notes or "",
-            "is_favorite": 1 if entry.tags and 'favorite' in entry.tags else 0,
-            "created_date": getattr(entry, 'ctime', datetime.now()).isoformat()
-        }
-
+    @_writer
     def add_entry(self, data: dict):
+        entry_id = self._add(data)
+        return self._record_to_dict(self._records[entry_id])
+
+    def _add(self, data, unique=True):
+        entry = self._apply_add(data, unique=unique)
+        entry_id = str(entry.uuid)
+        # The creation time travels with the op so replay doesn't restamp it
+        self._commit({"op": "add", "id": entry_id, "data": self._journal_data(data),
+                      "created": self._records[entry_id].created_date})
+        self._notify("added", entry_id)
+        return entry_id
+
+    @_writer
+    def discard_entries(self, entry_ids):
+        """
+        Takes back entries added earlier in the open batch, as if they had
+        never been added: they leave the tree and their pending journal
+        operations and change events are dropped. Used to roll back imports.
+        """
+        if not self._batch_depth:
+            raise RuntimeError("discard_entries() only works inside batch()")
+        ids = set()
+        for entry_id in entry_ids:
+            entry = self._find_entry(entry_id)
+            if not entry: continue
+            ids.add(str(entry.uuid))
+            self._unindex_entry(str(entry.uuid))
+            self._kp.delete_entry(entry)
+        self._drop_pending(ids)
+
+    def _drop_pending(self, ids):
+        self._pending_ops = [op for op in self._pending_ops if op.get("id") not in ids]
+        self._pending_changes = [c for c in self._pending_changes if c.id not in ids]
+
+    # --- Flags ---
+
+    @_synchronized
+    def set_flags(self, flag, values, entry_ids=None):
+        """
+        Records the outcome of a check run outside the manager (e.g. the
+        breach scan): values maps entry id -> detail for the flagged entries.
+        With entry_ids, only those entries were checked and only they change;
+        otherwise values replaces the flag entirely. get_entries(flag) lists
+        the flagged entries that aren't deleted. flag is one of FLAGS.
+        """
+        if flag not in self.FLAGS:
+            raise ValueError(f"Unknown flag: {flag}")
+        flagged = self._flags.setdefault(flag, {})
+        if entry_ids is None:
+            flagged.clear()
+        else:
+            for entry_id in entry_ids:
+                flagged.pop(entry_id, None)
+        for entry_id, detail in values.items():
+            if entry_id in self._entries:
+                flagged[entry_id] = detail
+
+    @_synchronized
+    def get_flag(self, flag, entry_id, default=None):
+        return self._flags.get(flag, {}).get(self._normalize_id(entry_id), default)
+
+    # --- Duplicates ---
+
+    @_synchronized
+    def classify_entry(self, data):
+        """
+        Compares an entry dict against the vault's active entries by site
+        host and username, then password. Returns (DuplicateIndex.NEW,
+        IDENTICAL or CONFLICT, id of the matching entry or None).
+        """
+        return self._duplicates.classify(data.get('website'), data.get('username'),
+                                         data.get('password'), self._read_password)
+
+    def _read_password(self, entry_id):
+        return self._entries[entry_id].password or ""
+
+    @_writer
+    def merge_entries(self, rows, policy="skip", result=None):
+        """
+        Adds the rows that aren't in the vault yet (see classify_entry()).
+        Identical rows are always skipped; a conflicting row is skipped,
+        overwrites the entry's password (and its notes and favorite flag, if
+        the row has them), or is
+        added alongside it, depending on policy (see DUPLICATE_POLICIES).
+        Rows are checked against the ones merged before them, too.
+
+        Returns result (a fresh MergeResult if none is passed), which is
+        filled in as rows go, so inside a batch revert_merge(result) can
+        take back a merge that stopped half way.
+        """
+        if policy not in self.DUPLICATE_POLICIES:
+            raise ValueError(f"Unknown duplicate policy: {policy}")
+        result = result if result is not None else MergeResult()
+        for data in rows:
+            status, existing = self.classify_entry(data)
+            if status == DuplicateIndex.NEW or (status == DuplicateIndex.CONFLICT and policy == "keep"):
+                # The duplicate index decided; the title/username rule doesn't apply
+                result.added.append(self._add(data, unique=False))
+            elif status == DuplicateIndex.CONFLICT and policy == "overwrite":
+                if existing not in result.overwritten:
+                    result.overwritten[existing] = self._overwritable_fields(existing)
+                self.update_entry(existing, {k: data[k] for k in ('password', 'notes', 'is_favorite') if k in data})
+            else:
+                result.skipped += 1
+        return result
+
+    def _overwritable_fields(self, entry_id):
+        entry = self._entries[entry_id]
+        return {'password': entry.password or "", 'notes': entry.notes or "",
+                'is_favorite': self._records[entry_id].is_favorite}
+
+    @_writer
+    def revert_merge(self, result):
+        """Undoes merge_entries() inside the batch it ran in, like discard_entries()."""
+        if not self._batch_depth:
+            raise RuntimeError("revert_merge() only works inside batch()")
+        for entry_id, fields in result.overwritten.items():
+            entry = self._entries.get(entry_id)
+            if entry:
+                self._apply_update(entry, fields)
+        self.discard_entries(result.added)
+        self._drop_pending(set(result.overwritten))
+
+    @staticmethod
+    def _journal_data(data):
+        keys = ('username', 'password', 'website', 'notes', 'is_favorite')
+        return {k: data[k] for k in keys if k in data}
+
+    def _apply_add(self, data, entry_id=None, unique=True, created=None):
+        if entry_id:
+            existing = self._find_entry(entry_id)
+            if existing:
+                # Replaying an add that already made it into the KDBX
+                self._apply_update(existing, data)
+                return existing
+
         group = self._kp.root_group
         # Use website or username as title
         title = data.get('website', '') or data.get('username', 'No Title')
-        entry = self._kp.add_entry(
-            destination_group=group,
+        username = data.get('username', '')
+        # Same rule as PyKeePass.add_entry, but checked against the index:
+        # its own check scans the whole group, which makes imports quadratic
+        if unique and not entry_id and (self._root_group_id, title, username) in self._entry_keys:
+            raise Exception('An entry "{}" already exists in "{}"'.format(title, group))
+        is_favorite = 1 if data.get('is_favorite') == 1 else 0
+        entry = Entry(
             title=title,
-            username=data.get('username', ''),
-            password=data.get('password', '')
+            username=username,
+            password=data.get('password', ''),
+            url=data.get('website', ''),
+            notes=data.get('notes', ''),
+            tags=['favorite'] if is_favorite else None,
+            kp=self._kp
         )
-        entry.url = data.get('website', '')
-        entry.notes = data.get('notes', '')
-        
-        if data.get('is_favorite') == 1:
-            entry.tags = ['favorite']
-            
-        self.save()
-        return self._entry_to_dict(entry)
+        group.append(entry)
+        if entry_id:
+            entry.uuid = uuid.UUID(entry_id)
+        else:
+            entry_id = str(entry.uuid)
+        if created is None:
+            created = datetime.now(timezone.utc).replace(microsecond=0)
+        else:
+            entry.ctime = created
 
-    def get_entries(self, filter_type='all', query=None):
-        if not self._kp: return []
-        
-        entries = []
-        
-        # Helper to check tags
-        def has_tag(e, tag): return e.tags and tag in e.tags
-        
-        all_entries = self._kp.entries
+        # A brand-new entry's fields are known; don't read them back from the XML
+        record = EntryRecord.from_fields(entry_id, title, username, data.get('website', ''),
+                                         is_favorite, created)
+        self._index_entry(entry, self._root_group_id, record)
+        return entry
+
+    def _record_to_dict(self, record, include_secrets=True):
+        data = record.to_dict()
+        if include_secrets:
+            entry = self._entries[record.id]
+            data["password"] = entry.password or "" # KeePass handles encryption
+            data["notes"] = entry.notes or ""
+        return data
+
+    def _view_records(self, filter_type, ids=None):
+        """Yields the cached records belonging to a view (see VIEWS)."""
+        if filter_type not in self.VIEWS:
+            raise ValueError(f"Unknown view: {filter_type}")
+        # A flag that was never set (no breach list, audit still running) is empty
+        flagged = self._flags.get(filter_type, {})
+        if ids is None:
+            # Recycle Bin membership is tracked by the index
+            ids = self._deleted_ids if filter_type == 'deleted' else self._active_ids
+            if filter_type == 'duplicates':
+                ids = self._duplicates.duplicate_ids()
+            elif filter_type in self.FLAGS:
+                ids = self._active_ids.intersection(flagged)
         
-        for e in all_entries:
-            # Check Recycle Bin by Name
-            parent = e.group
-            is_deleted = False
-            while parent:
-                if parent.name == "Recycle Bin":
-                    is_deleted = True
-                    break
-                parent = parent.parentgroup
-            
-            if e.title == "MMPasswd_Config":
+        for entry_id in ids:
+            r = self._records[entry_id]
+            if r.title == "MMPasswd_Config":
                 continue
                 
-            if filter_type != 'deleted' and is_deleted:
-                continue
-            elif filter_type == 'deleted' and not is_deleted:
-                continue
             if filter_type == 'favorites':
-                if not has_tag(e, 'favorite'): continue
+                if not r.is_favorite: continue
+                
+            elif filter_type == 'duplicates':
+                if not self._duplicates.is_duplicate(entry_id): continue
+                
+            elif filter_type in self.FLAGS:
+                if entry_id not in flagged: continue
                 
             elif filter_type == 'all':
                 pass # Show everything except deleted
-            
-            # Query Filter
-            if query:
-                q = query.lower()
-                if q not in (e.url or "").lower() and q not in (e.username or "").lower():
-                    continue
                     
-            entries.append(self._entry_to_dict(e))
+            yield r
+
+    @_synchronized
+    def get_entries(self, filter_type='all', query=None, include_secrets=True):
+        """
+        Returns entry dicts for a view.
+        With include_secrets=False, password and notes are left out (listing mode).
+        """
+        if not self._kp: return []
+        
+        ids = None
+        # Query Filter: answered by the n-gram index instead of a full scan
+        if query:
+            ids = self._search_index.search(
+                query, within=self._deleted_ids if filter_type == 'deleted' else self._active_ids)
+        
+        records = list(self._view_records(filter_type, ids))
             
         # Sort by website/username
-        entries.sort(key=lambda x: (x['website'] or x['username']).lower())
-        return entries
+        if filter_type == 'duplicates':
+            # Keep each set of duplicates together
+            records.sort(key=lambda r: (self._duplicates.key_of(r.id), r.sort_key))
+        else:
+            records.sort(key=lambda r: r.sort_key)
+        return [self._record_to_dict(r, include_secrets) for r in records]
+
+    @_synchronized
+    def search_candidates(self, filter_type, query, within=None):
+        """
+        Ids in a view that could match query in a ranked search. Pass the
+        previous candidates as `within` when fuzzy.can_refine(old, new).
+        """
+        if not self._kp or not query: return set()
+        ids = self._deleted_ids if filter_type == 'deleted' else self._active_ids
+        if within is not None:
+            ids = ids.intersection(within)
+        q = query.strip().lower()
+        return self._search_index.fuzzy_candidates(q, fuzzy.typo_limit(q), within=ids)
+
+    def get_ranked_entries(self, filter_type, query, limit=50, include_secrets=True, within=None,
+                           candidates=None):
+        """
+        Fuzzy search: best `limit` matches first, tolerating typos and acronyms
+        and favouring website hits and favorites. Each dict carries a "score".
 
+        Exact substring hits come straight from the n-gram index; the wider
+        typo-tolerant candidate set is only scored when there are fewer than
+        `limit` of them. Scoring works on a snapshot of the records, outside
+        the lock, so saves and edits aren't held up by a search.
+
+        Callers that already have search_candidates() for this query pass it
+        as `candidates` so it isn't computed a second time.
+        """
+        with self._lock:
+            if not self._kp or not query: return []
+            if candidates is None:
+                candidates = self.search_candidates(filter_type, query, within)
+            exact = self._search_index.search(query.strip(), within=candidates)
+            records = list(self._view_records(filter_type, exact if len(exact) >= limit else candidates))
+
+        matches = list(fuzzy.top_matches(query, records, limit))
+        if not include_secrets:
+            return [dict(record.to_dict(), score=score) for score, record in matches]
+        results = []
+        with self._lock:
+            for score, record in matches:
+                if record.id not in self._entries:
+                    continue # deleted while we were scoring
+                data = self._record_to_dict(record, include_secrets)
+                data["score"] = score
+                results.append(data)
+        return results
+
+    @_synchronized
     def get_entry(self, entry_id):
         if not self._kp: return None
-        try:
-            uuid_obj = uuid.UUID(entry_id)
-            entry = self._kp.find_entries(uuid=uuid_obj, first=True)
-            return self._entry_to_dict(entry)
-        except:
-            return None
+        record = self._find_record(entry_id)
+        return self._record_to_dict(record) if record else None
 
+    @_synchronized
+    def get_password(self, entry_id):
+        """Reads a single entry's password on demand."""
+        entry = self._find_entry(entry_id)
+        return (entry.password or "") if entry else None
+
+    # Entries read per lock acquisition by get_passwords()
+    PASSWORD_CHUNK = 1000
+
+    def get_passwords(self, filter_type='all', ids=None):
+        """
+        Yields (id, password) for every entry in a view that has one, for
+        vault-wide checks; with ids, only for those of them still in the view.
+        Reads PASSWORD_CHUNK entries per lock acquisition, so a scan on a
+        worker thread doesn't stall the UI for its whole run.
+        """
+        with self._lock:
+            if not self._kp: return
+            if ids is not None:
+                ids = (self._deleted_ids if filter_type == 'deleted' else self._active_ids).intersection(ids)
+            ids = [r.id for r in self._view_records(filter_type, ids)]
+        for start in range(0, len(ids), self.PASSWORD_CHUNK):
+            with self._lock:
+                chunk = []
+                for entry_id in ids[start:start + self.PASSWORD_CHUNK]:
+                    entry = self._entries.get(entry_id) # may have gone meanwhile
+                    password = entry.password if entry is not None else None
+                    if password:
+                        chunk.append((entry_id, password))
+            yield from chunk
+
+    @_writer
     def update_entry(self, entry_id, data: dict):
         if not self._kp: return
-        uuid_obj = uuid.UUID(entry_id)
-        entry = self._kp.find_entries(uuid=uuid_obj, first=True)
+        entry = self._find_entry(entry_id)
         if not entry: return
 
+        self._apply_update(entry, data)
+        self._commit({"op": "update", "id": str(entry.uuid), "data": self._journal_data(data)})
+        self._notify("updated", str(entry.uuid))
+
+    @_writer
+    def set_passwords(self, passwords):
+        """
+        Replaces several entries' passwords ({id: password}) under a single
+        lock acquisition (for bulk rotation). Returns the ids changed. Wrap
+        calls in batch() to save once; inside a batch, a failure puts every
+        password back.
+        """
+        previous = {}
+        try:
+            for entry_id, password in passwords.items():
+                entry = self._find_entry(entry_id)
+                if not entry: continue
+                previous[str(entry.uuid)] = entry.password or ""
+                self.update_entry(str(entry.uuid), {'password': password})
+        except Exception:
+            if self._batch_depth:
+                for entry_id, password in previous.items():
+                    self._apply_update(self._entries[entry_id], {'password': password})
+                self._drop_pending(set(previous))
+            raise
+        return list(previous)
+
+    def _apply_update(self, entry, data):
         if 'website' in data: 
             entry.url = data['website']
             # Re-sync title to website
@@ -197,35 +1069,72 @@ class KeePassDatabaseManager:
                 current_tags.remove('favorite')
                 
         entry.tags = current_tags
-        self.save()
+        self._index_entry(entry, self._entry_group.get(str(entry.uuid)))
 
+    @_writer
     def delete_entry(self, entry_id, soft=True):
         if not self._kp: return
-        uuid_obj = uuid.UUID(entry_id)
-        entry = self._kp.find_entries(uuid=uuid_obj, first=True)
+        entry = self._find_entry(entry_id)
         if not entry: return
-        
+
+        entry_id = str(entry.uuid)
+        self._apply_delete(entry, soft)
+        self._commit({"op": "delete", "id": entry_id, "soft": soft})
+        self._notify("moved" if soft else "removed", entry_id)
+
+    def _apply_delete(self, entry, soft=True):
         if soft:
             # Move to Recycle Bin
             rb_group = self._kp.find_groups(name="Recycle Bin", first=True)
             if not rb_group:
                  rb_group = self._kp.add_group(self._kp.root_group, "Recycle Bin")
+            rb_id = str(rb_group.uuid)
+            self._recycled_groups.add(rb_id)
             self._kp.move_entry(entry, rb_group)
+            self._index_entry(entry, rb_id)
         else:
+            self._unindex_entry(str(entry.uuid))
             self._kp.delete_entry(entry)
-            
-        self.save()
 
+    @_writer
     def restore_entry(self, entry_id):
         if not self._kp: return
-        uuid_obj = uuid.UUID(entry_id)
-        entry = self._kp.find_entries(uuid=uuid_obj, first=True)
+        entry = self._find_entry(entry_id)
         if not entry: return
         
+        self._apply_restore(entry)
+        self._commit({"op": "restore", "id": str(entry.uuid)})
+        self._notify("moved", str(entry.uuid))
+
+    def _apply_restore(self, entry):
         # Move back to Root Group
         # Ideally, we should restore to original group if we tracked it, but Root is safe default.
         self._kp.move_entry(entry, self._kp.root_group)
-        self.save()
+        self._index_entry(entry, self._root_group_id)
+
+    def _apply_op(self, op):
+        """Re-applies a journal operation (see _commit()). Safe to apply twice."""
+        kind = op.get("op")
+        if kind == "config":
+            self._apply_config(op["key"], op["value"])
+            return
+        if kind == "add":
+            created = op.get("created")
+            self._apply_add(op["data"], entry_id=op["id"],
+                            created=datetime.fromisoformat(created) if created else None)
+            return
+
+        entry = self._find_entry(op.get("id"))
+        if not entry: return
+        if kind == "update":
+            self._apply_update(entry, op["data"])
+        elif kind == "delete":
+            self._apply_delete(entry, op.get("soft", True))
+        elif kind == "restore":
+            self._apply_restore(entry)
 
-    def get_search_results(self, filter_type, query):
-        return self.get_entries(filter_type, query)
+    def get_search_results(self, filter_type, query, include_secrets=True, ranked=False, limit=50, within=None,
+                           candidates=None):
+        if ranked and query:
+            return self.get_ranked_entries(filter_type, query, limit, include_secrets, within, candidates)
+        return self.get_entries(filter_type, query, include_secrets)
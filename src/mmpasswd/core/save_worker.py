@@ -0,0 +1,121 @@
+import threading
+import time
+
+class SaveWorker:
+    """
+    Single background writer for the vault file.
+    Bursts of mark_dirty() calls are coalesced into one save once things go
+    quiet for `delay` seconds. flush() forces the pending save and waits for it.
+
+    on_status(state, error) is called from the worker thread with
+    state in ("saving", "saved", "error"); UI code must marshal it itself.
+    """
+
+    RETRY_DELAY = 5.0
+
+    def __init__(self, save_func, delay=0.5, on_status=None):
+        self._save_func = save_func
+        self._delay = delay
+        self._on_status = on_status
+
+        self._cond = threading.Condition()
+        self._generation = 0        # bumped on every mark_dirty()
+        self._saved_generation = 0  # last generation written to disk
+        self._last_mark = 0.0
+        self._flush_requested = False
+        self._stopping = False
+        self.last_error = None
+
+        self._thread = threading.Thread(target=self._run, name="mmpasswd-save", daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self):
+        with self._cond:
+            return self._generation != self._saved_generation
+
+    def mark_dirty(self):
+        with self._cond:
+            self._generation += 1
+            self._last_mark = time.monotonic()
+            self._cond.notify_all()
+
+    def flush(self, timeout=None):
+        """Saves any pending changes now. Returns True if everything is on disk."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            target = self._generation
+            self._flush_requested = True
+            self._cond.notify_all()
+            while self._saved_generation < target and self._thread.is_alive():
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                # A failed save during a flush is reported, not retried forever
+                if self.last_error is not None and not self._flush_requested:
+                    break
+                self._cond.wait(remaining)
+            return self._saved_generation >= target
+
+    def stop(self, timeout=None):
+        """Flushes pending changes and shuts the thread down."""
+        ok = self.flush(timeout)
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        return ok
+
+    def _report(self, state, error=None):
+        if self._on_status:
+            try:
+                self._on_status(state, error)
+            except Exception:
+                pass
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._generation == self._saved_generation and not self._stopping:
+                    self._flush_requested = False
+                    self._cond.wait()
+                if self._stopping and self._generation == self._saved_generation:
+                    return
+
+                # Coalesce: wait until marks stop arriving (or a flush is asked for)
+                while not self._flush_requested and not self._stopping:
+                    remaining = self._last_mark + self._delay - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                target = self._generation
+                flushing = self._flush_requested
+
+            self._report("saving")
+            try:
+                self._save_func()
+                error = None
+            except Exception as e:
+                error = e
+
+            with self._cond:
+                if error is None:
+                    self._saved_generation = max(self._saved_generation, target)
+                    self.last_error = None
+                else:
+                    self.last_error = error
+                if self._saved_generation == self._generation or error is not None:
+                    self._flush_requested = False
+                self._cond.notify_all()
+
+            if error is None:
+                self._report("saved")
+            else:
+                self._report("error", error)
+                # Back off before retrying so a full disk doesn't spin
+                with self._cond:
+                    if not flushing and not self._stopping:
+                        self._cond.wait(self.RETRY_DELAY)
+                    elif self._stopping:
+                        return
@@ -0,0 +1,176 @@
+import re
+
+_ALNUM = re.compile(r"[a-z0-9]")
+
+class SearchIndex:
+    """
+    Inverted n-gram index for case-insensitive substring search.
+
+    Every indexed field is broken into 3-character grams. A query is answered
+    by intersecting the posting sets of its trigrams and then checking the few
+    surviving candidates, instead of scanning every entry. Queries shorter
+    than a trigram match most of the vault anyway and are simply scanned.
+    Fuzzy candidates come from the same postings plus an index of the
+    characters fields start with (see fuzzy_candidates()).
+    """
+
+    def __init__(self):
+        self._postings = {} # gram -> set of ids
+        self._texts = {}    # id -> lowercased fields joined by "\n"
+        self._chars = {}    # id -> set of characters in the fields
+        self._heads = {}    # first character of a field -> set of ids
+
+    def __len__(self):
+        return len(self._texts)
+
+    @staticmethod
+    def _grams(text):
+        grams = set()
+        for field in text.split("\n"):
+            grams.update([field[i:i + 3] for i in range(len(field) - 2)])
+        return grams
+
+    @staticmethod
+    def _initials(text):
+        # A field's first character and its first letter or digit, where
+        # acronym and subsequence matches have to start
+        heads = set()
+        for field in text.split("\n"):
+            if field:
+                heads.add(field[0])
+                first = _ALNUM.search(field)
+                if first:
+                    heads.add(first.group())
+        return heads
+
+    @staticmethod
+    def _add_posting(postings, key, item_id):
+        if key in postings:
+            postings[key].add(item_id)
+        else:
+            postings[key] = {item_id}
+
+    @staticmethod
+    def _remove_posting(postings, key, item_id):
+        ids = postings.get(key)
+        if ids is not None:
+            ids.discard(item_id)
+            if not ids:
+                del postings[key]
+
+    def add(self, item_id, *fields):
+        """Indexes (or re-indexes) an item under the given text fields."""
+        text = "\n".join(f.lower() for f in fields if f)
+        if self._texts.get(item_id) == text:
+            return
+        self.remove(item_id)
+        self._texts[item_id] = text
+        self._chars[item_id] = frozenset(text)
+        for gram in self._grams(text):
+            self._add_posting(self._postings, gram, item_id)
+        for head in self._initials(text):
+            self._add_posting(self._heads, head, item_id)
+
+    def remove(self, item_id):
+        text = self._texts.pop(item_id, None)
+        if text is None: return
+        del self._chars[item_id]
+        for gram in self._grams(text):
+            self._remove_posting(self._postings, gram, item_id)
+        for head in self._initials(text):
+            self._remove_posting(self._heads, head, item_id)
+
+    def clear(self):
+        self._postings = {}
+        self._texts = {}
+        self._chars = {}
+        self._heads = {}
+
+    def _candidates(self, q):
+        if len(q) < 3:
+            return self._texts.keys()
+        grams = {q[i:i + 3] for i in range(len(q) - 2)}
+        sets = []
+        for gram in grams:
+            postings = self._postings.get(gram)
+            if not postings:
+                return ()
+            sets.append(postings)
+        sets.sort(key=len)
+        return sets[0].intersection(*sets[1:])
+
+    def search(self, query, within=None):
+        """
+        Returns the set of ids whose fields contain query (case-insensitive).
+        If `within` is given, only those ids are considered.
+        """
+        q = query.lower()
+        if "\n" in q:
+            return set()
+        candidates = self._candidates(q)
+        if within is not None:
+            if len(within) < len(candidates):
+                candidates = [i for i in within if i in self._texts]
+            else:
+                candidates = [i for i in candidates if i in within]
+        texts = self._texts
+        return {i for i in candidates if q in texts[i]}
+
+    def fuzzy_candidates(self, query, max_missing, within=None):
+        """
+        Ids that could match query with up to `max_missing` typos, gathered
+        from the postings instead of a scan:
+
+        - ids sharing at least half of the query's trigrams (one typo breaks
+          at most three of them);
+        - ids with a field starting where the query does and holding all but
+          `max_missing` of its letters, for acronyms ("aws"), subsequences
+          ("gmil") and typos that break most trigrams ("gmial").
+
+        If `within` is given (the previous candidates of a query this one
+        extends), only those ids are checked, so the set shrinks as the user
+        types. Queries shorter than a trigram are scanned.
+        """
+        q = query.lower()
+        if not q or "\n" in q:
+            return set()
+        q_chars = set(q)
+        need_chars = len(q_chars) - max_missing
+        chars = self._chars
+        grams = self._grams(q)
+        if not grams:
+            ids = chars.keys() if within is None else [i for i in within if i in chars]
+            return {i for i in ids if len(q_chars.intersection(chars[i])) >= need_chars}
+
+        texts = self._texts
+        q_counts = [(ch, q.count(ch)) for ch in q_chars]
+        def has_letters(i):
+            # All but max_missing of the query's letters, repeats included
+            if len(q_chars.intersection(chars[i])) < need_chars:
+                return False
+            text = texts[i]
+            return sum(max(0, n - text.count(ch)) for ch, n in q_counts) <= max_missing
+
+        need = (len(grams) + 1) // 2
+        heads = self._heads.get(q[0], set())
+        postings = [self._postings.get(gram, ()) for gram in grams]
+        if within is not None and len(within) < sum(map(len, postings)) + len(heads):
+            # Cheaper to check the few ids left than to walk the postings
+            found = set()
+            for i in within:
+                text = texts.get(i)
+                if text is None:
+                    continue
+                if sum(gram in text for gram in grams) >= need or (i in heads and has_letters(i)):
+                    found.add(i)
+            return found
+
+        counts = {}
+        for ids in postings:
+            for i in ids:
+                counts[i] = counts.get(i, 0) + 1
+        found = {i for i, n in counts.items() if n >= need}
+        found.update(i for i in heads if i not in found and has_letters(i))
+        if within is not None:
+            found.intersection_update(within)
+        return found
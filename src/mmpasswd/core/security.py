@@ -1,5 +1,7 @@
 import os
 import base64
+import hmac
+import hashlib
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
@@ -58,3 +60,16 @@ class SecurityManager:
     @staticmethod
     def generate_salt() -> bytes:
         return os.urandom(16)
+
+class SessionHasher:
+    """
+    HMAC-SHA256 under a random key that only lives as long as this object,
+    for in-memory caches keyed by passwords: the digests can't be matched
+    against a hash list or carried over to another session.
+    """
+
+    def __init__(self):
+        self._key = os.urandom(32)
+
+    def digest(self, text):
+        return hmac.new(self._key, (text or "").encode("utf-8", "surrogatepass"), hashlib.sha256).digest()
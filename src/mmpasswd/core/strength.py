@@ -0,0 +1,408 @@
+import math
+import re
+import threading
+from collections import OrderedDict, namedtuple
+from datetime import date
+from itertools import product
+from . import wordlists
+from .security import SessionHasher
+
+# Password strength as an estimate of how many guesses an attacker needs,
+# in the spirit of zxcvbn: the password is split into the patterns a
+# cracker tries first (common passwords, words, names, keyboard walks,
+# sequences, repeats, dates) and whatever is left is brute-forced. The
+# cheapest way to cover the whole password is the estimate.
+
+StrengthEstimate = namedtuple("StrengthEstimate", "guesses bits score warning")
+
+Match = namedtuple("Match", "i j log10 pattern")  # password[i:j + 1], log10 of its guesses
+
+# Longer passwords are analysed this many characters at a time (see _cover())
+MAX_LENGTH = 64
+# Score n means fewer than 10 ** SCORE_LOG10[n] guesses; above the last is 4
+SCORE_LOG10 = (3, 6, 8, 10)
+# Brute force guesses per character
+BRUTEFORCE_CARDINALITY = 10
+# Least guesses a pattern of 2+ characters counts for
+MIN_SUBMATCH_LOG10 = math.log10(50)
+# Years close to now are the first ones tried
+REFERENCE_YEAR = date.today().year
+MIN_YEAR_SPACE = 20
+# Estimates kept for the strength meters, which re-check on every key
+MEMO_SIZE = 256
+
+WARNINGS = {
+    "passwords": "This is a very common password.",
+    "english": "A single word is easy to guess.",
+    "names": "Names and surnames are easy to guess.",
+    "spatial": "Keyboard patterns like \"qwerty\" are easy to guess.",
+    "sequence": "Sequences like \"abc\" or \"6543\" are easy to guess.",
+    "repeat": "Repeated characters like \"aaa\" are easy to guess.",
+    "date": "Dates and years are easy to guess.",
+}
+
+# --- Dictionaries (built on first use) ---
+
+_dictionaries = None
+_dictionaries_lock = threading.Lock()
+
+def _load_dictionaries():
+    """
+    ({word: ((list name, rank), ...)}, {every prefix of a word}) from the
+    bundled frequency lists. Matching stops extending a substring as soon
+    as it stops being a prefix, so most positions cost a lookup or two.
+    """
+    global _dictionaries
+    with _dictionaries_lock:
+        if _dictionaries is None:
+            ranked, prefixes = {}, set()
+            for name in ("passwords", "english", "names"):
+                for rank, word in enumerate(getattr(wordlists, name.upper()).split(), 1):
+                    ranked.setdefault(word, []).append((name, rank))
+                    prefixes.update(word[:k] for k in range(1, len(word)))
+            _dictionaries = ({w: tuple(r) for w, r in ranked.items()}, prefixes)
+    return _dictionaries
+
+L33T = {
+    'a': "4@", 'b': "8", 'c': "({[<", 'e': "3", 'g': "69", 'i': "1!|",
+    'l': "1|7", 'o': "0", 's': "$5", 't': "+7", 'x': "%", 'z': "2",
+}
+_L33T_LETTERS = {}  # substitute -> letters it may stand for
+for _letter, _subs in L33T.items():
+    for _sub in _subs:
+        _L33T_LETTERS.setdefault(_sub, []).append(_letter)
+# Ambiguous substitutes ("1" is i or l) multiply the readings to try; cap them
+MAX_L33T_READINGS = 16
+
+def _uppercase_variations(token):
+    upper = sum(c.isupper() for c in token)
+    lower = sum(c.islower() for c in token)
+    if not upper:
+        return 1
+    if not lower or upper == 1 and (token[0].isupper() or token[-1].isupper()):
+        return 2 # ALL CAPS, Capitalized, or lasT
+    return sum(math.comb(upper + lower, k) for k in range(1, min(upper, lower) + 1))
+
+def _l33t_variations(token, subs):
+    variations = 1
+    for sub, letter in subs.items():
+        subbed = token.count(sub)
+        if not subbed:
+            continue
+        plain = token.lower().count(letter)
+        if not plain:
+            variations *= 2
+        else:
+            variations *= sum(math.comb(subbed + plain, k) for k in range(1, min(subbed, plain) + 1))
+    return variations
+
+def _dictionary_matches(password, lowered=None, subs=None, reverse=False):
+    ranked, prefixes = _load_dictionaries()
+    lowered = lowered if lowered is not None else password.lower()
+    n = len(password)
+    matches = []
+    for i in range(n):
+        for j in range(i, n):
+            word = lowered[i:j + 1]
+            for name, rank in ranked.get(word, ()):
+                token = password[i:j + 1]
+                guesses = rank * _uppercase_variations(token)
+                if subs:
+                    used = {s: l for s, l in subs.items() if s in token}
+                    if not used:
+                        continue # nothing substituted, the plain pass found it
+                    guesses *= _l33t_variations(token, used)
+                if reverse:
+                    # Positions in the password read forwards
+                    matches.append(Match(n - 1 - j, n - 1 - i, math.log10(guesses * 2), name))
+                else:
+                    matches.append(Match(i, j, math.log10(guesses), name))
+            if word not in prefixes:
+                break
+    return matches
+
+def _l33t_matches(password):
+    present = [c for c in dict.fromkeys(password) if c in _L33T_LETTERS]
+    if not present:
+        return []
+    matches = []
+    readings = product(*(_L33T_LETTERS[c] for c in present))
+    for _, letters in zip(range(MAX_L33T_READINGS), readings):
+        subs = dict(zip(present, letters))
+        lowered = "".join(subs.get(c, c) for c in password).lower()
+        matches.extend(_dictionary_matches(password, lowered, subs))
+    return matches
+
+def _reversed_matches(password):
+    backwards = password[::-1]
+    if backwards == password:
+        return []
+    return _dictionary_matches(backwards, reverse=True)
+
+# --- Keyboard walks ---
+
+# Rows of a US QWERTY keyboard, each key as (unshifted, shifted). Keys are
+# adjacent along a row and to the two keys above and below (the rows are staggered).
+_KEY_ROWS = (
+    ("`~", "1!", "2@", "3#", "4$", "5%", "6^", "7&", "8*", "9(", "0)", "-_", "=+"),
+    ("qQ", "wW", "eE", "rR", "tT", "yY", "uU", "iI", "oO", "pP", "[{", "]}", "\\|"),
+    ("aA", "sS", "dD", "fF", "gG", "hH", "jJ", "kK", "lL", ";:", "'\""),
+    ("zZ", "xX", "cC", "vV", "bB", "nN", "mM", ",<", ".>", "/?"),
+)
+_KEY_DIRECTIONS = ((0, -1), (0, 1), (-1, 0), (-1, 1), (1, -1), (1, 0))
+
+def _build_keyboard():
+    base = {}  # any character -> its unshifted key
+    for row in _KEY_ROWS:
+        for key in row:
+            base[key[0]] = base[key[1]] = key[0]
+    graph = {}  # unshifted key -> {neighbour: direction}
+    for r, row in enumerate(_KEY_ROWS):
+        for c, key in enumerate(row):
+            graph[key[0]] = {}
+            for direction, (dr, dc) in enumerate(_KEY_DIRECTIONS):
+                rr, cc = r + dr, c + dc
+                if 0 <= rr < len(_KEY_ROWS) and 0 <= cc < len(_KEY_ROWS[rr]):
+                    graph[key[0]][_KEY_ROWS[rr][cc][0]] = direction
+    shifted = {key[1] for row in _KEY_ROWS for key in row}
+    degree = sum(len(n) for n in graph.values()) / len(graph)
+    return base, graph, shifted, degree
+
+_KEY_BASE, _KEYBOARD, _SHIFTED, _KEY_DEGREE = _build_keyboard()
+
+def _spatial_log10(length, turns, shifted, unshifted):
+    starts = len(_KEYBOARD)
+    guesses = 0
+    for i in range(2, length + 1):
+        for j in range(1, min(turns, i - 1) + 1):
+            guesses += math.comb(i - 1, j - 1) * starts * _KEY_DEGREE ** j
+    if shifted and unshifted:
+        guesses *= sum(math.comb(shifted + unshifted, k) for k in range(1, min(shifted, unshifted) + 1))
+    elif shifted:
+        guesses *= 2
+    return math.log10(guesses)
+
+def _spatial_matches(password):
+    matches = []
+    n = len(password)
+    i = 0
+    while i < n - 2:
+        j, turns, last = i, 0, None
+        while j + 1 < n:
+            here, there = _KEY_BASE.get(password[j]), _KEY_BASE.get(password[j + 1])
+            direction = _KEYBOARD.get(here, {}).get(there)
+            if direction is None:
+                break
+            if direction != last:
+                turns += 1
+                last = direction
+            j += 1
+        if j - i >= 2:
+            token = password[i:j + 1]
+            shifted = sum(c in _SHIFTED for c in token)
+            matches.append(Match(i, j, _spatial_log10(len(token), turns, shifted, len(token) - shifted), "spatial"))
+        i = max(j, i + 1)
+    return matches
+
+# --- Sequences, repeats, dates ---
+
+MAX_SEQUENCE_STEP = 5
+
+def _sequence_matches(password):
+    matches = []
+    n = len(password)
+    i = 0
+    while i < n - 2:
+        delta = ord(password[i + 1]) - ord(password[i])
+        if not delta or abs(delta) > MAX_SEQUENCE_STEP:
+            i += 1
+            continue
+        j = i + 1
+        while j + 1 < n and ord(password[j + 1]) - ord(password[j]) == delta:
+            j += 1
+        if j - i >= 2:
+            first = password[i]
+            if first in "aAzZ019":
+                base = 4
+            elif first.isdigit():
+                base = 10
+            else:
+                base = 26
+            if delta < 0:
+                base *= 2
+            matches.append(Match(i, j, math.log10(base * (j - i + 1)), "sequence"))
+        i = j
+    return matches
+
+_REPEAT_GREEDY = re.compile(r"(.+)\1+", re.S)
+_REPEAT_LAZY = re.compile(r"(.+?)\1+", re.S)
+_REPEAT_BASE = re.compile(r"^(.+?)\1+$", re.S)
+
+def _repeat_matches(password):
+    matches = []
+    pos = 0
+    while pos < len(password):
+        greedy = _REPEAT_GREEDY.search(password, pos)
+        if not greedy:
+            break
+        lazy = _REPEAT_LAZY.search(password, pos)
+        if len(greedy.group(0)) > len(lazy.group(0)):
+            found, unit = greedy, _REPEAT_BASE.match(greedy.group(0)).group(1)
+        else:
+            found, unit = lazy, lazy.group(1)
+        count = len(found.group(0)) // len(unit)
+        log10 = _analyse(unit)[0] + math.log10(count)
+        matches.append(Match(found.start(), found.end() - 1, log10, "repeat"))
+        pos = found.end()
+    return matches
+
+_YEAR = re.compile(r"19\d\d|20\d\d")
+_SEPARATED_DATE = re.compile(r"(?=(\d{1,4})([\s/\\_.-])(\d{1,2})\2(\d{1,4}))")
+
+def _year_log10(year):
+    return math.log10(max(abs(year - REFERENCE_YEAR), MIN_YEAR_SPACE))
+
+def _date_year(parts):
+    """The year of a (day, month, year) in any common order, or None if it isn't a date."""
+    for year, rest in ((parts[2], parts[:2]), (parts[0], parts[1:])):
+        if len(year) not in (2, 4):
+            continue
+        y = int(year)
+        if len(year) == 2:
+            y += 1900 if y > 50 else 2000
+        elif not 1000 <= y <= 2050:
+            continue
+        a, b = int(rest[0]), int(rest[1])
+        if 1 <= a <= 31 and 1 <= b <= 12 or 1 <= a <= 12 and 1 <= b <= 31:
+            return y
+    return None
+
+def _date_matches(password):
+    matches = []
+    for found in _YEAR.finditer(password):
+        matches.append(Match(found.start(), found.end() - 1, _year_log10(int(found.group(0))), "date"))
+
+    # Run-together dates: 1391, 010191, 19910113...
+    n = len(password)
+    for i in range(n - 3):
+        for j in range(i + 3, min(n, i + 8)):
+            token = password[i:j + 1]
+            if not (token.isascii() and token.isdigit()):
+                break
+            years = []
+            for k1 in range(1, len(token) - 1):
+                for k2 in range(k1 + 1, len(token)):
+                    parts = (token[:k1], token[k1:k2], token[k2:])
+                    if max(len(p) for p in parts) <= 4:
+                        year = _date_year(parts)
+                        if year is not None:
+                            years.append(year)
+            if years:
+                year = min(years, key=lambda y: abs(y - REFERENCE_YEAR))
+                matches.append(Match(i, j, math.log10(365) + _year_log10(year), "date"))
+
+    for found in _SEPARATED_DATE.finditer(password):
+        first, _, second, third = found.groups()
+        year = _date_year((first, second, third))
+        if year is not None:
+            end = found.start() + len(first) + len(second) + len(third) + 1
+            matches.append(Match(found.start(), end, math.log10(365 * 4) + _year_log10(year), "date"))
+    return matches
+
+# --- Estimate ---
+
+def _analyse(password):
+    """(log10 of the guesses, the patterns on the cheapest path) for a password."""
+    n = len(password)
+    if not n:
+        return 0.0, []
+    by_end = [[] for _ in range(n)]
+    for matcher in (_dictionary_matches, _l33t_matches, _reversed_matches, _spatial_matches,
+                    _sequence_matches, _repeat_matches, _date_matches):
+        for match in matcher(password):
+            by_end[match.j].append(match)
+
+    brute = math.log10(BRUTEFORCE_CARDINALITY)
+    best = [0.0] * (n + 1)  # best[k]: cheapest cover of password[:k]
+    back = [None] * (n + 1)
+    for k in range(1, n + 1):
+        best[k] = best[k - 1] + brute
+        for match in by_end[k - 1]:
+            floor = MIN_SUBMATCH_LOG10 if match.j > match.i else brute
+            cost = best[match.i] + max(match.log10, floor)
+            if cost < best[k]:
+                best[k], back[k] = cost, match
+
+    path = []
+    k = n
+    while k:
+        match = back[k]
+        if match is None:
+            k -= 1
+        else:
+            path.append(match)
+            k = match.i
+    return best[n], path[::-1]
+
+def _cover(password):
+    """
+    _analyse() for passwords of any length. The matchers are quadratic, so
+    past MAX_LENGTH a password repeating one unit is costed as that repeat,
+    and anything else is analysed piece by piece, with a piece copied from
+    earlier on costing only the guess of where it was copied from.
+    """
+    if len(password) <= MAX_LENGTH:
+        return _analyse(password)
+    whole = _REPEAT_BASE.match(password)
+    if whole:
+        unit = whole.group(1)
+        log10 = _cover(unit)[0] + math.log10(len(password) // len(unit))
+        return log10, [Match(0, len(password) - 1, log10, "repeat")]
+
+    log10, path = 0.0, []
+    for start in range(0, len(password), MAX_LENGTH):
+        piece = password[start:start + MAX_LENGTH]
+        end = start + len(piece) - 1
+        if start and password.find(piece, 0, end) >= 0:
+            cost = max(math.log10(start), MIN_SUBMATCH_LOG10)
+            path.append(Match(start, end, cost, "repeat"))
+        else:
+            cost, piece_path = _analyse(piece)
+            path.extend(m._replace(i=m.i + start, j=m.j + start) for m in piece_path)
+        log10 += cost
+    return log10, path
+
+def _estimate(password):
+    log10, path = _cover(password)
+    score = sum(log10 >= t for t in SCORE_LOG10)
+    warning = ""
+    if path and score <= 2:
+        longest = max(path, key=lambda m: m.j - m.i)
+        warning = WARNINGS[longest.pattern]
+    return StrengthEstimate(guesses=10 ** min(log10, 300), bits=log10 * math.log2(10),
+                            score=score, warning=warning)
+
+# Recent estimates, keyed by an HMAC of the password under a key that only
+# lives for this session, so the memo never holds the passwords themselves
+_memo = OrderedDict()
+_memo_hasher = SessionHasher()
+_memo_lock = threading.Lock()
+
+def estimate(password):
+    """
+    Estimates how many guesses it takes to crack a password. Returns a
+    StrengthEstimate: guesses, bits (log2 of guesses), score 0-4 and a
+    warning naming the weakest pattern found ("" when the score is 3+).
+    """
+    digest = _memo_hasher.digest(password)
+    with _memo_lock:
+        result = _memo.get(digest)
+        if result is not None:
+            _memo.move_to_end(digest)
+            return result
+    result = _estimate(password)
+    with _memo_lock:
+        _memo[digest] = result
+        if len(_memo) > MEMO_SIZE:
+            _memo.popitem(last=False)
+    return result
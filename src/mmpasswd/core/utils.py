@@ -1,45 +1,27 @@
-import secrets
-import string
 import threading
 import pyperclip
+from .strength import estimate
+from .generator import generate_passwords
 
 def generate_password(length=16, use_upper=True, use_lower=True, use_digits=True, use_symbols=True):
-    """Generates a secure random password."""
-    chars = ""
-    if use_lower: chars += string.ascii_lowercase
-    if use_upper: chars += string.ascii_uppercase
-    if use_digits: chars += string.digits
-    if use_symbols: chars += "!@#$%^&*()_+-=[]{}|;:,.<>?"
-    
-    if not chars:
-        chars = string.ascii_letters + string.digits # Fallback
-        
-    return ''.join(secrets.choice(chars) for _ in range(length))
+    """Generates a secure random password (see generator.generate_passwords() for policies and bulk use)."""
+    policy = {"length": length, "upper": use_upper, "lower": use_lower,
+              "digits": use_digits, "symbols": use_symbols}
+    if not (use_upper or use_lower or use_digits or use_symbols):
+        policy.update(upper=True, lower=True, digits=True) # Fallback
+    return generate_passwords(1, policy)[0]
 
 def check_password_strength(password):
     """
-    Evaluates password strength.
+    Evaluates password strength from an estimate of the guesses needed to
+    crack it (see strength.estimate()).
     Returns: (score, label, color)
     Score: 0-4
     """
     if not password:
         return 0, "Empty", "gray"
-        
-    length = len(password)
-    has_lower = any(c.islower() for c in password)
-    has_upper = any(c.isupper() for c in password)
-    has_digit = any(c.isdigit() for c in password)
-    has_special = any(c in "!@#$%^&*()_+-=[]{}|;:,.<>?" for c in password)
-    
-    score = 0
-    if length >= 8: score += 1
-    if length >= 12: score += 1
-    if has_lower and has_upper: score += 1
-    if has_digit and has_special: score += 1
-    
-    # Cap score at 4
-    score = min(score, 4)
-    
+
+    score = estimate(password).score
     if score == 0: return 1, "Very Weak", "#ef5350" # Red 400
     if score == 1: return 1, "Weak", "#ef5350"
     if score == 2: return 2, "Fair", "#ffa726" # Orange 400
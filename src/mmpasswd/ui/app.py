@@ -1,13 +1,27 @@
 import customtkinter as ctk
 from . import dialogs as messagebox
 import os
+import queue
 from datetime import datetime
-from .styles import COLORS, get_website_icon, THEMES
-from ..core.utils import generate_password, secure_copy, check_password_strength
+from .styles import COLORS, get_website_icon, THEMES, set_theme, restyle
+from ..core.keepass_db import sort_key_for, VaultBusy
 from .settings_view import SettingsView
 from .edit_view import EditView
+from .search_controller import SearchController
+from .virtual_list import VirtualList
+from .detail_view import DetailView
+from .tasks import run_in_background
+from ..core import breach
+from ..core.audit import PasswordAudit
 
 class PasswordManagerApp(ctk.CTk):
+    SEARCH_LIMIT = 50
+    # Views whose membership depends on other entries or on checks; they are
+    # re-queried on change instead of patched row by row
+    DERIVED_VIEWS = ('duplicates', 'compromised', 'audit')
+    # Edits are audited together once they pause for this long
+    AUDIT_DELAY_MS = 1000
+
     def __init__(self, kdbx_manager):
         super().__init__()
         
@@ -65,8 +79,36 @@ class PasswordManagerApp(ctk.CTk):
             
         self.lock_timer = None
         
+        # Writes from this (the Tk) thread fail with VaultBusy rather than
+        # freeze the window while an import holds the vault (see try_write())
+        self.kdbx_manager.set_interactive_thread()
+
+        # Saves run on a background thread; status comes back through this queue
+        self.save_events = queue.Queue()
+        self.kdbx_manager.start_background_saves(
+            on_status=lambda state, error: self.save_events.put((state, error)))
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        # Entry changes are applied to the list row by row (see apply_changes()).
+        # They may come from worker threads, so they are queued for the Tk thread.
+        self.change_events = queue.Queue()
+        self.kdbx_manager.add_listener(self.change_events.put)
+        
+        # Offline breach check (see start_breach_scan())
+        self.breach_corpus = None
+        self.breach_task = None
+        # Password audit (see start_audit())
+        self.auditor = PasswordAudit()
+        self.audit_task = None
+        self.audit_after = None
+        self.audit_again = False
+        self.audit_changed = None # ids edited since the last audit; None for a full run
+        
         self.setup_ui()
         self.load_passwords()
+        self.poll_save_status()
+        self.start_breach_scan()
+        self.start_audit()
         
         # Start timer AFTER UI is ready
         self.bind_all("<Any-KeyPress>", self.reset_lock_timer)
@@ -79,14 +121,75 @@ class PasswordManagerApp(ctk.CTk):
             self.after_cancel(self.lock_timer)
         self.lock_timer = self.after(self.lock_timeout * 1000, self.lock_app)
     
+    def flush_saves(self):
+        """Writes pending changes to disk. Returns False if the user chose to stay."""
+        if self.kdbx_manager.stop_background_saves():
+            return True
+        return messagebox.askyesno("Save Failed",
+                                   f"Your latest changes could not be saved.\n{self.kdbx_manager.last_save_error}\nClose anyway?")
+
+    def try_write(self, func, *args, **kwargs):
+        """Runs a vault write, telling the user instead when an import or rotation holds the vault."""
+        try:
+            func(*args, **kwargs)
+            return True
+        except VaultBusy:
+            messagebox.showinfo("Busy", "An import or password rotation is running.\n"
+                                        "Try again once it has finished.")
+            return False
+
+    def wait_for_vault(self, retry):
+        """Cancels a running import and calls retry once the vault is free again."""
+        if hasattr(self, 'settings_view') and self.settings_view.winfo_exists():
+            self.settings_view.cancel_import()
+        self.after(200, retry)
+
+    def on_close(self):
+        try:
+            flushed = self.flush_saves()
+        except VaultBusy:
+            self.wait_for_vault(self.on_close)
+            return
+        if not flushed:
+            self.kdbx_manager.start_background_saves(
+                on_status=lambda state, error: self.save_events.put((state, error)))
+            return
+        self.close_breach_corpus()
+        self.destroy()
+
+    def poll_save_status(self):
+        if not self.winfo_exists(): return
+        try:
+            while True:
+                state, error = self.save_events.get_nowait()
+                if state == "saving":
+                    self.save_status_label.configure(text="Saving…", text_color=COLORS["text_dim"])
+                elif state == "saved":
+                    self.save_status_label.configure(text="✓ All changes saved", text_color=COLORS["text_dim"])
+                else:
+                    self.save_status_label.configure(text=f"⚠ Save failed: {error}", text_color=COLORS["danger"])
+        except queue.Empty:
+            pass
+        self.apply_changes()
+        self.after(200, self.poll_save_status)
+
     def lock_app(self):
         if not self.winfo_exists(): return
+        # Make sure nothing is left unsaved before the vault is dropped.
+        # Locking is never blocked on a failed save (nobody may be at the screen).
+        try:
+            self.kdbx_manager.stop_background_saves()
+        except VaultBusy:
+            self.wait_for_vault(self.lock_app)
+            return
         self.is_locked = True
         # Close any open dialogs (toplevels)
         for widget in self.winfo_children():
             if isinstance(widget, ctk.CTkToplevel):
                 widget.destroy()
-                
+        
+        self.kdbx_manager.remove_listener(self.change_events.put)
+        self.close_breach_corpus()
         self.destroy()
         # Main.py loop will end? No, main.py logic needs to handle re-login.
         # Main.py logic:
@@ -132,6 +235,9 @@ class PasswordManagerApp(ctk.CTk):
         nav_items = [
             ("all", "📋 All Items"),
             ("favorites", "⭐ Favorites"),
+            ("duplicates", "👥 Duplicates"),
+            ("compromised", "⚠ Compromised"),
+            ("audit", "🛡 Security Audit"),
             ("deleted", "🗑 Recently Deleted")
         ]
 
@@ -153,6 +259,11 @@ class PasswordManagerApp(ctk.CTk):
         btn.pack(side="bottom", fill="x", padx=10, pady=20)
         self.nav_buttons['settings'] = btn
 
+        # Save Status
+        self.save_status_label = ctk.CTkLabel(sidebar, text="", font=("Segoe UI", 11),
+                                            text_color=COLORS["text_dim"], wraplength=240, justify="left")
+        self.save_status_label.pack(side="bottom", padx=20, anchor="w")
+
     def create_content_area(self):
         self.content_frame = ctk.CTkFrame(self.main_container, fg_color="transparent")
         self.content_frame.pack(side="right", fill="both", expand=True, padx=20, pady=20)
@@ -171,7 +282,10 @@ class PasswordManagerApp(ctk.CTk):
         self.search_entry = ctk.CTkEntry(self.search_frame, placeholder_text="Search passwords...",
                                        fg_color="transparent", border_width=0, text_color=COLORS["text"])
         self.search_entry.pack(side="left", fill="both", expand=True, padx=10, pady=5)
-        self.search_entry.bind("<KeyRelease>", lambda e: self.load_passwords())
+        # Debounced, off-thread search; only the final query reaches the list
+        self.search_controller = SearchController(self.search_entry, self.kdbx_manager,
+                                                  lambda: self.current_view, self.on_search_results,
+                                                  limit=self.SEARCH_LIMIT)
 
         # Split View (List + Detail)
         self.split_view = ctk.CTkFrame(self.content_frame, fg_color="transparent")
@@ -182,11 +296,17 @@ class PasswordManagerApp(ctk.CTk):
         self.is_navigating_back = False
         
         # List
-        self.list_frame = ctk.CTkScrollableFrame(self.split_view, fg_color=COLORS["input_bg"], width=300)
+        # Virtualized: only the visible rows exist as widgets
+        self.list_frame = VirtualList(self.split_view, self.format_list_item, self.show_detail,
+                                      sort_key=lambda e: sort_key_for(e['website'], e['username']),
+                                      fg_color=COLORS["input_bg"], width=300)
         self.list_frame.pack(side="left", fill="both", padx=(0, 20))
+        self.list_view = None  # view the list was last loaded for
+        self.list_query = None # search it shows (ranked, so not in sort order)
 
         # Detail
-        self.detail_frame = ctk.CTkFrame(self.split_view, fg_color=COLORS["input_bg"])
+        # Built once; selecting an entry only reconfigures it
+        self.detail_frame = DetailView(self.split_view, self)
         self.detail_frame.pack(side="right", fill="both", expand=True)
         self.show_empty_detail()
 
@@ -244,20 +364,86 @@ class PasswordManagerApp(ctk.CTk):
             # 2. Pack Split View
             self.split_view.pack(fill="both", expand=True)
             
-            self.load_passwords()
+            # The list is kept current by apply_changes(); only reload on a new view
+            if self.list_view != view_id:
+                self.load_passwords()
             self.show_empty_detail()
 
     def load_passwords(self):
-        # Clear list
-        for widget in self.list_frame.winfo_children():
-            widget.destroy()
-            
+        # Data or view changed: cached search candidates are no longer valid
+        self.search_controller.reset()
         search_query = self.search_entry.get().strip()
         
-        for entry in self.kdbx_manager.get_search_results(self.current_view, search_query if search_query else None):
-            self.create_list_item(entry)
+        # Listing mode: passwords/notes are fetched only when an item is opened.
+        # Searches are ranked (typos, acronyms) and capped at the best SEARCH_LIMIT hits.
+        entries = self.kdbx_manager.get_search_results(self.current_view, search_query if search_query else None,
+                                                       include_secrets=False, ranked=True,
+                                                       limit=self.SEARCH_LIMIT)
+        self.list_view = self.current_view
+        self.list_query = search_query or None
+        self.render_list(entries)
+
+    def on_search_results(self, query, entries):
+        self.list_query = query or None
+        self.render_list(entries)
+
+    def render_list(self, entries):
+        self.list_frame.set_items(entries)
+
+    def apply_changes(self):
+        """Applies queued manager change events to the list, one row each."""
+        reload = False
+        try:
+            while True:
+                change = self.change_events.get_nowait()
+                self.check_change(change)
+                reload = self.apply_change(change) or reload
+        except queue.Empty:
+            pass
+        if reload:
+            self.load_passwords()
 
-    def create_list_item(self, entry):
+    def check_change(self, change):
+        """Keeps the breach and audit results current, whatever the list shows."""
+        # Reuse and similarity span entries, so any change re-runs the audit,
+        # which only reads the passwords that changed
+        if change.kind == "reset":
+            self.audit_changed = None
+        elif self.audit_changed is not None:
+            self.audit_changed.add(change.id)
+        self.schedule_audit()
+        if change.kind in ("added", "updated"):
+            self.recheck_breach(change.id)
+        elif change.kind == "reset":
+            self.start_breach_scan() # too many new passwords to check one by one
+
+    def apply_change(self, change):
+        """Patches the list for one change. Returns True if it needs a full reload instead."""
+        if self.list_view is None: return False
+        showing = self.current_view == self.list_view
+        if change.kind == "reset" or self.list_query or self.list_view in self.DERIVED_VIEWS:
+            # Ranked results and derived views can't be patched in place; query again instead
+            if not showing:
+                self.list_view = None # reload when the list is next shown
+            elif self.list_query and change.kind != "reset":
+                self.search_controller.reset()
+                self.search_controller.schedule()
+            else:
+                return True
+            return False
+
+        lst = self.list_frame
+        index = lst.index_of(lambda e: e['id'] == change.id)
+        visible = self.list_view in change.views
+        if index is not None and visible:
+            lst.replace(index, change.entry)
+        elif index is not None:
+            lst.remove(index)
+        elif visible:
+            lst.insert(change.entry)
+        return False
+
+    def format_list_item(self, entry):
         display_name = entry.get('website') or entry.get('username') or "Untitled"
         icon = get_website_icon(display_name)
         
@@ -265,148 +451,106 @@ class PasswordManagerApp(ctk.CTk):
         if entry.get('is_favorite', 0) == 1:
             display_name += " ⭐"
         
-        btn = ctk.CTkButton(self.list_frame, 
-                          text=f"{icon}  {display_name}\n      {entry['username']}", 
-                          fg_color="transparent", hover_color=COLORS["sidebar"],
-                          anchor="w", height=60,
-                          text_color=COLORS["text"],
-                          command=lambda: self.show_detail(entry))
-        btn.pack(fill="x", pady=1)
+        return f"{icon}  {display_name}\n      {entry['username']}"
 
     def show_empty_detail(self):
-        for widget in self.detail_frame.winfo_children():
-            widget.destroy()
-        ctk.CTkLabel(self.detail_frame, text="Select an item to view details", 
-                    text_color=COLORS["text_dim"]).pack(expand=True)
+        self.detail_frame.show_empty()
         self.selected_id = None
 
     def show_detail(self, entry):
-        for widget in self.detail_frame.winfo_children():
-            widget.destroy()
-        
         self.selected_id = entry['id']
         
-        # Password is now directly available via KDBX manager (decrypted)
-        password = entry['password']
-
-        # Header
-        header = ctk.CTkFrame(self.detail_frame, fg_color="transparent")
-        header.pack(fill="x", padx=30, pady=30)
-        
-        display_name = entry.get('website') or entry.get('username') or "Untitled"
-        icon = get_website_icon(display_name)
-        ctk.CTkLabel(header, text=icon, font=("Segoe UI", 48)).pack(side="left", padx=(0, 20))
-        
-        title_box = ctk.CTkFrame(header, fg_color="transparent")
-        title_box.pack(side="left", fill="x")
-        ctk.CTkLabel(title_box, text=display_name, font=("Segoe UI", 24, "bold")).pack(anchor="w")
-        ctk.CTkLabel(title_box, text=entry['username'], text_color=COLORS["text_dim"]).pack(anchor="w")
-
-        # Actions
-        if self.current_view == 'deleted':
-             self.create_deleted_actions(header, entry)
-        else:
-             self.create_normal_actions(header, entry)
-
-        # Fields
-        fields_frame = ctk.CTkScrollableFrame(self.detail_frame, fg_color="transparent")
-        fields_frame.pack(fill="both", expand=True, padx=20)
-        
-        self.add_field(fields_frame, "Username", entry['username'])
-        self.add_field(fields_frame, "Password", "•" * len(password) if password else "", 
-                      copy_val=password, is_password=True)
-        self.add_field(fields_frame, "Website", entry['website'], link=True)
-        self.add_field(fields_frame, "Notes", entry['notes'])
-
-    def add_field(self, parent, label, value, copy_val=None, is_password=False, link=False):
-        if not value and not is_password: return
-        
-        f = ctk.CTkFrame(parent, fg_color=COLORS["sidebar"], corner_radius=6)
-        f.pack(fill="x", pady=5)
-        
-        ctk.CTkLabel(f, text=label, font=("Segoe UI", 13, "bold"), text_color=COLORS["text_dim"]).pack(anchor="w", padx=15, pady=(10,0))
-        
-        val_frame = ctk.CTkFrame(f, fg_color="transparent")
-        val_frame.pack(fill="x", padx=15, pady=(0, 10))
-        
-        val_lbl = ctk.CTkLabel(val_frame, text=value, font=("Segoe UI", 16), text_color=COLORS["text"])
-        val_lbl.pack(side="left")
-        
-        # Strength Indicator for Details
-        if is_password:
-             strength_frame = ctk.CTkFrame(f, fg_color="transparent")
-             strength_frame.pack(fill="x", padx=15, pady=(0, 10))
-             
-             bar = ctk.CTkProgressBar(strength_frame, height=4, width=150)
-             bar.pack(side="left", padx=(0, 10))
-             
-             lbl_strength = ctk.CTkLabel(strength_frame, text="", font=("Segoe UI", 11))
-             lbl_strength.pack(side="left")
-             
-             # Calculate once
-             score, label, color = check_password_strength(copy_val if copy_val else "")
-             bar.set(score / 4)
-             bar.configure(progress_color=color)
-             lbl_strength.configure(text=label, text_color=color)
-        
-        if copy_val or is_password:
-            def copy():
-                if is_password:
-                    secure_copy(copy_val if copy_val else value)
-                    messagebox.showinfo("Secure Copy", f"{label} copied! Will clear in 30s.")
-                else:
-                    self.clipboard_clear()
-                    self.clipboard_append(copy_val if copy_val else value)
-                    messagebox.showinfo("Copied", f"{label} copied!")
-
-            ctk.CTkButton(val_frame, text="Copy", width=50, height=24, fg_color=COLORS["primary"],
-                        command=copy).pack(side="right")
-            
-            if is_password:
-                # Eye Toggle for Detail View
-                def toggle_visibility():
-                    if val_lbl.cget("text").startswith("•"):
-                        val_lbl.configure(text=copy_val)
-                    else:
-                        val_lbl.configure(text="•" * len(copy_val))
-                
-                ctk.CTkButton(val_frame, text="👁", width=30, height=24, fg_color=COLORS["sidebar"],
-                            command=toggle_visibility).pack(side="right", padx=5)
-
-    def create_normal_actions(self, parent, entry):
-        btn_frame = ctk.CTkFrame(parent, fg_color="transparent")
-        btn_frame.pack(side="right", anchor="n")
-        
-        # Edit
-        ctk.CTkButton(btn_frame, text="✎", width=40, fg_color=COLORS["sidebar"], 
-                    command=lambda: self.open_edit_dialog(entry)).pack(side="left", padx=5)
-        
-        # Favorite
-        is_fav = entry['is_favorite'] == 1
-        fav_color = COLORS["warning"] if is_fav else COLORS["sidebar"]
-        ctk.CTkButton(btn_frame, text="⭐", width=40, fg_color=fav_color,
-                    command=lambda: self.toggle_favorite(entry)).pack(side="left", padx=5)
-
-        # Delete
-        ctk.CTkButton(btn_frame, text="🗑", width=40, fg_color=COLORS["danger"],
-                    command=lambda: self.delete_entry(entry)).pack(side="left", padx=5)
-
-    def create_deleted_actions(self, parent, entry):
-        btn_frame = ctk.CTkFrame(parent, fg_color="transparent")
-        btn_frame.pack(side="right", anchor="n")
-        
-        # Restore Button (Icon + Text, cleaner look)
-        ctk.CTkButton(btn_frame, text="Restore", fg_color=COLORS["success"], 
-                      text_color=COLORS["text_button"], width=80, height=30,
-                      command=lambda: self.restore_entry_action(entry)).pack(side="left", padx=5)
-        
-        # Delete Forever (Outline style for less visual noise until hovered, or just red)
-        # Making it red outline or cleaner red button
-        ctk.CTkButton(btn_frame, text="Delete", fg_color="transparent", 
-                      border_width=1, border_color=COLORS["danger"],
-                      text_color=COLORS["danger"], hover_color=COLORS["input_bg"],
-                      width=80, height=30,
-                      command=lambda: self.hard_delete_entry(entry)).pack(side="left", padx=5)
+        # List items carry no secrets; read the full entry on demand
+        if 'password' not in entry:
+            entry = self.kdbx_manager.get_entry(entry['id']) or dict(entry, password="", notes="")
+        self.detail_frame.show(entry, deleted=self.current_view == 'deleted',
+                               breach_count=self.kdbx_manager.get_flag('compromised', entry['id'], 0),
+                               findings=self.kdbx_manager.get_flag('audit', entry['id'], ()))
+
+    # --- Breach Check ---
+
+    def start_breach_scan(self, on_done=None):
+        """
+        Checks every password against the local breach list set in Settings
+        (see core.breach), on a worker thread. Results become the 'compromised'
+        flag. on_done(message) reports the outcome.
+        """
+        path = self.kdbx_manager.get_config("breach_corpus")
+        if not path or self.breach_task: return
+        manager = self.kdbx_manager
+
+        def work():
+            corpus = breach.BreachCorpus(path)
+            try:
+                return corpus, breach.scan(manager, corpus)
+            except Exception:
+                corpus.close()
+                raise
+
+        def done(outcome, error):
+            self.breach_task = None
+            if error:
+                message = f"Breach check failed: {error}"
+            else:
+                corpus, found = outcome
+                self.close_breach_corpus()
+                self.breach_corpus = corpus # kept open to check edited entries
+                manager.set_flags('compromised', found)
+                message = f"{len(found)} compromised passwords found."
+                if self.list_view == 'compromised':
+                    self.list_view = None
+                    if self.current_view == 'compromised':
+                        self.load_passwords()
+            if on_done:
+                on_done(message)
+
+        self.breach_task = run_in_background(self, work, done)
+
+    def recheck_breach(self, entry_id):
+        # A single lookup touches a page or two of the list, cheap enough for the UI thread
+        if not self.breach_corpus: return
+        found = breach.scan(self.kdbx_manager, self.breach_corpus, [entry_id])
+        self.kdbx_manager.set_flags('compromised', found, [entry_id])
+
+    # --- Audit ---
+
+    def schedule_audit(self):
+        if self.audit_after:
+            self.after_cancel(self.audit_after)
+        self.audit_after = self.after(self.AUDIT_DELAY_MS, self.start_audit)
+
+    def start_audit(self):
+        """
+        Audits every password for weakness, reuse and near-duplicates (see
+        core.audit) on a worker thread. Findings become the 'audit' flag.
+        """
+        self.audit_after = None
+        if self.audit_task:
+            self.audit_again = True # the running audit may have missed the latest edits
+            return
+        manager = self.kdbx_manager
+        changed, self.audit_changed = self.audit_changed, set()
+
+        def done(findings, error):
+            self.audit_task = None
+            if error:
+                self.audit_changed = None # the next run starts over
+            else:
+                manager.set_flags('audit', findings)
+                if self.list_view == 'audit':
+                    self.list_view = None
+                    if self.current_view == 'audit':
+                        self.load_passwords()
+            if self.audit_again:
+                self.audit_again = False
+                self.start_audit()
+
+        self.audit_task = run_in_background(self, lambda: self.auditor.run(manager, changed), done)
+
+    def close_breach_corpus(self):
+        if self.breach_corpus:
+            self.breach_corpus.close()
+            self.breach_corpus = None
 
     # --- Actions ---
     
@@ -414,9 +558,10 @@ class PasswordManagerApp(ctk.CTk):
         current_val = int(entry.get('is_favorite', 0))
         new_val = 0 if current_val == 1 else 1
         
-        self.kdbx_manager.update_entry(entry['id'], {'is_favorite': new_val})
+        if not self.try_write(self.kdbx_manager.update_entry, entry['id'], {'is_favorite': new_val}):
+            return
         
-        self.load_passwords()
+        self.apply_changes()
         
         if self.selected_id == entry['id']:
             fresh_entry = self.kdbx_manager.get_entry(entry['id'])
@@ -425,20 +570,23 @@ class PasswordManagerApp(ctk.CTk):
 
     def delete_entry(self, entry):
         if messagebox.askyesno("Delete", "Move to trash?"):
-            self.kdbx_manager.delete_entry(entry['id'])
-            self.load_passwords()
+            if not self.try_write(self.kdbx_manager.delete_entry, entry['id']):
+                return
+            self.apply_changes()
             self.show_empty_detail()
 
     def restore_entry_action(self, entry):
-        self.kdbx_manager.restore_entry(entry['id'])
-        self.load_passwords()
+        if not self.try_write(self.kdbx_manager.restore_entry, entry['id']):
+            return
+        self.apply_changes()
         self.show_empty_detail()
         messagebox.showinfo("Restored", "Item restored to All Items.")
 
     def hard_delete_entry(self, entry):
         if messagebox.askyesno("Delete Forever", "This action cannot be undone."):
-            self.kdbx_manager.delete_entry(entry['id'], soft=False)
-            self.load_passwords()
+            if not self.try_write(self.kdbx_manager.delete_entry, entry['id'], soft=False):
+                return
+            self.apply_changes()
             self.show_empty_detail()
 
     # --- Dialogs ---
@@ -451,7 +599,7 @@ class PasswordManagerApp(ctk.CTk):
             
             # Save to DB
             if not first_run:
-                self.kdbx_manager.set_config("theme", theme_name)
+                self.try_write(self.kdbx_manager.set_config, "theme", theme_name)
                 
             # Save to Local Config (for Login Screen)
             import json
@@ -462,32 +610,14 @@ class PasswordManagerApp(ctk.CTk):
                 
             theme = THEMES[theme_name]
             ctk.set_appearance_mode(theme["mode"])
-            COLORS.clear()
-            COLORS.update(theme["colors"])
+            set_theme(theme_name)
             
-            # If first run, don't destroy UI as it's not built yet or handled by init
+            # If first run, the UI isn't built yet
             if first_run:
                 return
 
-            # Clear references
-            if hasattr(self, 'settings_view'): del self.settings_view
-            if hasattr(self, 'edit_view'): del self.edit_view
-                
-            self.main_container.destroy()
-            self.main_container = ctk.CTkFrame(self, fg_color=COLORS["bg"])
-            self.main_container.pack(fill="both", expand=True)
-            self.create_sidebar()
-            self.create_content_area()
-            
-            # Restore view
-            if self.current_view in ['settings', 'edit']:
-                # Edit state might be lost, just go back to settings or list
-                if self.current_view == 'edit': 
-                    self.switch_view('all')
-                else:
-                    self.switch_view(self.current_view)
-            else:
-                self.switch_view(self.current_view)
+            # Recolour the existing widgets in place; nothing is rebuilt or reloaded
+            restyle(self)
 
     def open_add_dialog(self):
         self.show_edit_view(None)
@@ -0,0 +1,211 @@
+import customtkinter as ctk
+from . import dialogs as messagebox
+from .styles import COLORS, get_website_icon
+from ..core.utils import secure_copy, check_password_strength
+
+class DetailField(ctk.CTkFrame):
+    """One labelled value in the detail pane. Hidden while it has nothing to show."""
+
+    def __init__(self, parent, label, is_password=False, on_copy=None, on_reveal=None):
+        super().__init__(parent, fg_color=COLORS["sidebar"], corner_radius=6)
+        self.is_password = is_password
+        self.on_reveal = on_reveal
+        self.masked = True
+
+        ctk.CTkLabel(self, text=label, font=("Segoe UI", 13, "bold"), text_color=COLORS["text_dim"]).pack(anchor="w", padx=15, pady=(10,0))
+
+        val_frame = ctk.CTkFrame(self, fg_color="transparent")
+        val_frame.pack(fill="x", padx=15, pady=(0, 10))
+
+        self.value_label = ctk.CTkLabel(val_frame, text="", font=("Segoe UI", 16), text_color=COLORS["text"])
+        self.value_label.pack(side="left")
+
+        if on_copy:
+            ctk.CTkButton(val_frame, text="Copy", width=50, height=24, fg_color=COLORS["primary"],
+                        command=on_copy).pack(side="right")
+
+        if is_password:
+            # Eye Toggle
+            ctk.CTkButton(val_frame, text="👁", width=30, height=24, fg_color=COLORS["sidebar"],
+                        command=self.toggle_visibility).pack(side="right", padx=5)
+
+            # Strength Indicator
+            strength_frame = ctk.CTkFrame(self, fg_color="transparent")
+            strength_frame.pack(fill="x", padx=15, pady=(0, 10))
+
+            self.strength_bar = ctk.CTkProgressBar(strength_frame, height=4, width=150)
+            self.strength_bar.pack(side="left", padx=(0, 10))
+
+            self.strength_label = ctk.CTkLabel(strength_frame, text="", font=("Segoe UI", 11))
+            self.strength_label.pack(side="left")
+
+    def set_value(self, value):
+        if not value and not self.is_password:
+            self.grid_remove()
+            return
+        self.grid()
+        if self.is_password:
+            # Masked until revealed; the secret itself is read on demand
+            self.masked = True
+            self.mask_length = len(value)
+            self.value_label.configure(text="•" * len(value))
+            score, label, color = check_password_strength(value)
+            self.strength_bar.set(score / 4)
+            self.strength_bar.configure(progress_color=color)
+            self.strength_label.configure(text=label, text_color=color)
+        else:
+            self.value_label.configure(text=value)
+
+    def toggle_visibility(self):
+        if self.masked:
+            self.value_label.configure(text=self.on_reveal())
+        else:
+            self.value_label.configure(text="•" * self.mask_length)
+        self.masked = not self.masked
+
+class DetailView(ctk.CTkFrame):
+    """
+    Detail pane for the selected entry. Its widgets are built once; show()
+    only reconfigures them, so moving through the list stays cheap.
+    """
+
+    def __init__(self, parent, app_instance):
+        super().__init__(parent, fg_color=COLORS["input_bg"])
+        self.app = app_instance
+        self.kdbx_manager = app_instance.kdbx_manager
+        self.entry = None
+
+        self.empty_label = ctk.CTkLabel(self, text="Select an item to view details",
+                                        text_color=COLORS["text_dim"])
+
+        self.body = ctk.CTkFrame(self, fg_color="transparent")
+
+        # Header
+        header = ctk.CTkFrame(self.body, fg_color="transparent")
+        header.pack(fill="x", padx=30, pady=30)
+
+        self.icon_label = ctk.CTkLabel(header, text="", font=("Segoe UI", 48))
+        self.icon_label.pack(side="left", padx=(0, 20))
+
+        title_box = ctk.CTkFrame(header, fg_color="transparent")
+        title_box.pack(side="left", fill="x")
+        self.title_label = ctk.CTkLabel(title_box, text="", font=("Segoe UI", 24, "bold"))
+        self.title_label.pack(anchor="w")
+        self.username_label = ctk.CTkLabel(title_box, text="", text_color=COLORS["text_dim"])
+        self.username_label.pack(anchor="w")
+
+        # Actions (one set is shown, depending on the view)
+        self.normal_actions = self.create_normal_actions(header)
+        self.deleted_actions = self.create_deleted_actions(header)
+
+        # Breach warning (only shown for compromised passwords)
+        self.breach_label = ctk.CTkLabel(self.body, text="", text_color=COLORS["text_button"],
+                                         fg_color=COLORS["danger"], corner_radius=6,
+                                         font=("Segoe UI", 13, "bold"))
+        # Audit findings (weak, reused or similar password)
+        self.audit_label = ctk.CTkLabel(self.body, text="", text_color=COLORS["text_button"],
+                                        fg_color=COLORS["warning"], corner_radius=6,
+                                        font=("Segoe UI", 13, "bold"))
+
+        # Fields
+        fields_frame = self.fields_frame = ctk.CTkScrollableFrame(self.body, fg_color="transparent")
+        fields_frame.pack(fill="both", expand=True, padx=20)
+        fields_frame.grid_columnconfigure(0, weight=1)
+
+        self.fields = {
+            'username': DetailField(fields_frame, "Username"),
+            'password': DetailField(fields_frame, "Password", is_password=True,
+                                    on_copy=self.copy_password, on_reveal=self.read_password),
+            'website': DetailField(fields_frame, "Website"),
+            'notes': DetailField(fields_frame, "Notes"),
+        }
+        # grid_remove() remembers the slot, so hidden fields come back in order
+        for row, field in enumerate(self.fields.values()):
+            field.grid(row=row, column=0, sticky="ew", pady=5)
+
+        self.show_empty()
+
+    def create_normal_actions(self, parent):
+        btn_frame = ctk.CTkFrame(parent, fg_color="transparent")
+
+        # Edit
+        ctk.CTkButton(btn_frame, text="✎", width=40, fg_color=COLORS["sidebar"],
+                    command=lambda: self.app.open_edit_dialog(self.entry)).pack(side="left", padx=5)
+
+        # Favorite
+        self.fav_button = ctk.CTkButton(btn_frame, text="⭐", width=40, fg_color=COLORS["sidebar"],
+                                        command=lambda: self.app.toggle_favorite(self.entry))
+        self.fav_button.pack(side="left", padx=5)
+
+        # Delete
+        ctk.CTkButton(btn_frame, text="🗑", width=40, fg_color=COLORS["danger"],
+                    command=lambda: self.app.delete_entry(self.entry)).pack(side="left", padx=5)
+        return btn_frame
+
+    def create_deleted_actions(self, parent):
+        btn_frame = ctk.CTkFrame(parent, fg_color="transparent")
+
+        # Restore Button (Icon + Text, cleaner look)
+        ctk.CTkButton(btn_frame, text="Restore", fg_color=COLORS["success"],
+                      text_color=COLORS["text_button"], width=80, height=30,
+                      command=lambda: self.app.restore_entry_action(self.entry)).pack(side="left", padx=5)
+
+        # Delete Forever
+        ctk.CTkButton(btn_frame, text="Delete", fg_color="transparent",
+                      border_width=1, border_color=COLORS["danger"],
+                      text_color=COLORS["danger"], hover_color=COLORS["input_bg"],
+                      width=80, height=30,
+                      command=lambda: self.app.hard_delete_entry(self.entry)).pack(side="left", padx=5)
+        return btn_frame
+
+    def show_empty(self):
+        self.entry = None
+        self.body.pack_forget()
+        self.empty_label.pack(expand=True)
+
+    def show(self, entry, deleted=False, breach_count=0, findings=()):
+        """
+        Shows a full entry (with password and notes). breach_count > 0 and
+        audit findings (see core.audit) add warnings above the fields.
+        """
+        self.entry = entry
+        display_name = entry.get('website') or entry.get('username') or "Untitled"
+        self.icon_label.configure(text=get_website_icon(display_name))
+        self.title_label.configure(text=display_name)
+        self.username_label.configure(text=entry['username'])
+
+        if deleted:
+            self.normal_actions.pack_forget()
+            self.deleted_actions.pack(side="right", anchor="n")
+        else:
+            self.deleted_actions.pack_forget()
+            self.normal_actions.pack(side="right", anchor="n")
+            is_fav = entry['is_favorite'] == 1
+            self.fav_button.configure(fg_color=COLORS["warning"] if is_fav else COLORS["sidebar"])
+
+        if breach_count:
+            self.breach_label.configure(text=f"⚠ This password appeared in {breach_count:,} data breaches. Change it.")
+            self.breach_label.pack(fill="x", padx=30, pady=(0, 10), before=self.fields_frame)
+        else:
+            self.breach_label.pack_forget()
+        if findings:
+            self.audit_label.configure(text="⚠ " + " · ".join(findings))
+            self.audit_label.pack(fill="x", padx=30, pady=(0, 10), before=self.fields_frame)
+        else:
+            self.audit_label.pack_forget()
+
+        for key, field in self.fields.items():
+            field.set_value(entry[key] or "")
+
+        self.empty_label.pack_forget()
+        self.body.pack(fill="both", expand=True)
+
+    def read_password(self):
+        if not self.entry: return ""
+        return self.kdbx_manager.get_password(self.entry['id']) or ""
+
+    def copy_password(self):
+        password = self.read_password()
+        if not password: return
+        secure_copy(password)
+        messagebox.showinfo("Secure Copy", "Password copied! Will clear in 30s.")
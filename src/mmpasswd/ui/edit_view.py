@@ -1,7 +1,8 @@
 import customtkinter as ctk
 from . import dialogs as messagebox
 from .styles import COLORS
-from ..core.utils import generate_password, secure_copy, check_password_strength
+from ..core.utils import secure_copy, check_password_strength
+from ..core import generator
 
 class EditView(ctk.CTkScrollableFrame):
     def __init__(self, parent, kdbx_manager, app_instance, entry=None, password=""):
@@ -77,16 +78,27 @@ class EditView(ctk.CTkScrollableFrame):
                           text_color=COLORS["text"],
                           command=toggle).pack(side="left", padx=5)
             
-            def generate():
-                pwd = generate_password()
+            def fill(pwd):
                 e.delete(0, 'end')
                 e.insert(0, pwd)
                 e.configure(show="")
                 update_strength()
+
+            def generate():
+                # Follows the generator settings, including any rule for this site
+                base, rules = generator.configured_policy(self.kdbx_manager)
+                website = self.fields['website'].get() if 'website' in self.fields else ""
+                try:
+                    fill(generator.generate_passwords(1, generator.policy_for(website, base, rules))[0])
+                except ValueError as err:
+                    messagebox.showerror("Error", f"Password rule: {err}")
                 
             ctk.CTkButton(frame, text="🎲", width=30, fg_color=COLORS["warning"], 
                           text_color=COLORS["text_button"],
                           command=generate).pack(side="left")
+            ctk.CTkButton(frame, text="Aa", width=30, fg_color=COLORS["sidebar"],
+                          text_color=COLORS["text"],
+                          command=lambda: fill(generator.generate_passphrases(1)[0])).pack(side="left", padx=(5, 0))
             
         else:
             e = ctk.CTkEntry(self, fg_color=COLORS["input_bg"], text_color=COLORS["text"])
@@ -108,7 +120,7 @@ class EditView(ctk.CTkScrollableFrame):
             else:
                 self.kdbx_manager.add_entry(data)
                 
-            self.app.load_passwords()
+            self.app.apply_changes()
             
             # If editing, update details view before showing it
             if self.entry:
@@ -2,9 +2,39 @@ import customtkinter as ctk
 from . import dialogs as messagebox
 import os
 from ..core.keepass_db import KeePassDatabaseManager
+from ..core import kdf
 from ..core.utils import check_password_strength
+from ..core.strength import estimate
 from .styles import COLORS
+from .tasks import run_in_background
 import base64
+import threading
+
+class CreateGate:
+    """
+    Lets Cancel stop a vault creation up to the moment the file is about
+    to be written, and no later: whichever of cancel() and commit() comes
+    first wins.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.cancelled = False
+        self.committed = False
+
+    def cancel(self):
+        """Returns False if the vault is already being written."""
+        with self._lock:
+            if self.committed: return False
+            self.cancelled = True
+            return True
+
+    def commit(self):
+        """Returns False if creation was cancelled."""
+        with self._lock:
+            if self.cancelled: return False
+            self.committed = True
+            return True
 
 class LoginWindow(ctk.CTk):
     def __init__(self, on_login_success):
@@ -31,6 +61,11 @@ class LoginWindow(ctk.CTk):
         self.failed_attempts = 0
         self.lockout_until = None
         
+        # Background unlock/create (see start_task)
+        self.task = None
+        self.busy = False
+        self.create_gate = None # CreateGate while a vault is being created
+        
         # Load Theme
         import json
         try:
@@ -40,9 +75,8 @@ class LoginWindow(ctk.CTk):
                     theme = data.get("theme", "Dark")
                     ctk.set_appearance_mode(theme)
                     if theme == "Light":
-                        from .styles import THEMES, COLORS
-                        COLORS.clear()
-                        COLORS.update(THEMES[theme]["colors"])
+                        from .styles import set_theme
+                        set_theme(theme)
         except: pass
         
         self.setup_ui()
@@ -114,11 +148,59 @@ class LoginWindow(ctk.CTk):
                                       font=("Segoe UI", 12, "bold"), wraplength=300)
         self.error_label.pack(pady=(0, 5))
 
-        ctk.CTkButton(main_container, text=btn_text, command=cmd, 
+        self.action_button = ctk.CTkButton(main_container, text=btn_text, command=cmd, 
                      fg_color=COLORS["primary"], text_color=COLORS["text_button"],
-                     hover_color=COLORS["primary_hover"], width=280, height=32, font=("Segoe UI", 14, "bold")).pack(pady=(10, 0))
+                     hover_color=COLORS["primary_hover"], width=280, height=32, font=("Segoe UI", 14, "bold"))
+        self.action_button.pack(pady=(10, 0))
+        
+        # Busy State (shown while the KDF runs on a worker thread)
+        self.busy_frame = ctk.CTkFrame(main_container, fg_color="transparent")
+        self.busy_bar = ctk.CTkProgressBar(self.busy_frame, mode="indeterminate", height=4, width=280)
+        self.busy_bar.pack(pady=(10, 5))
+        self.busy_label = ctk.CTkLabel(self.busy_frame, text="", font=("Segoe UI", 12), text_color=COLORS["text_dim"])
+        self.busy_label.pack()
+        ctk.CTkButton(self.busy_frame, text="Cancel", width=100, height=28, fg_color="transparent",
+                      border_width=1, border_color=COLORS["text_dim"], text_color=COLORS["text"],
+                      hover_color=COLORS["input_bg"], command=self.cancel_task).pack(pady=(5, 0))
+    
+    def set_busy(self, busy, message=""):
+        self.busy = busy
+        state = "disabled" if busy else "normal"
+        self.action_button.configure(state=state)
+        self.password_entry.configure(state=state)
+        if self.is_setup:
+            self.confirm_entry.configure(state=state)
+            
+        if busy:
+            self.busy_label.configure(text=message)
+            self.busy_frame.pack(pady=(5, 0))
+            self.busy_bar.start()
+        else:
+            self.busy_bar.stop()
+            self.busy_frame.pack_forget()
+    
+    def start_task(self, func, on_done, message):
+        def done(result, error):
+            self.set_busy(False)
+            on_done(result, error)
+        self.set_busy(True, message)
+        self.task = run_in_background(self, func, done)
+    
+    def cancel_task(self):
+        if self.create_gate and not self.create_gate.cancel():
+            # Past the point of no return; let the write finish
+            self.busy_label.configure(text="Writing the vault, almost done…")
+            return
+        self.create_gate = None
+        # The KDF can't be interrupted; abandon it and its manager instead
+        if self.task:
+            self.task.cancel()
+        self.kdbx_manager = KeePassDatabaseManager()
+        self.set_busy(False)
+        self.show_error("Cancelled.")
     
     def create_vault(self):
+        if self.busy: return
         pwd = self.password_entry.get()
         confirm = self.confirm_entry.get()
         
@@ -128,7 +210,8 @@ class LoginWindow(ctk.CTk):
              
         score, label, _ = check_password_strength(pwd)
         if score < 3:
-             self.show_error(f"Weak Password ({label}).\nUse mix of chars/digits/symbols.")
+             hint = estimate(pwd).warning or "Use a longer password or a few unrelated words."
+             self.show_error(f"Weak Password ({label}).\n{hint}")
              return
 
         if pwd != confirm:
@@ -138,19 +221,33 @@ class LoginWindow(ctk.CTk):
         if self.kdbx_manager.is_setup(): 
             if not messagebox.askyesno("Warning", "Vault exists! Overwrite?"):
                 return
-            
-            try:
-                self.kdbx_manager.create_database(pwd)
-                self.on_login_success(self.kdbx_manager)
-                self.destroy()
-            except Exception as e:
-                self.show_error(f"Failed: {e}")
+        
+        manager = self.kdbx_manager
+        gate = self.create_gate = CreateGate()
+        
+        def done(result, error):
+            self.create_gate = None
+            if error:
+                self.show_error(f"Failed: {error}")
+                return
+            self.on_login_success(manager)
+            self.destroy()
+        
+        def create():
+            # Tune the KDF to this machine before the vault is first written
+            params = kdf.calibrate(kdf.DEFAULT_TARGET_SECONDS)
+            # A cancelled creation must not touch the vault file
+            if not gate.commit(): return
+            manager.create_database(pwd, params)
+        
+        self.start_task(create, done, "Tuning encryption for this device…")
 
     def show_error(self, message):
         self.error_label.configure(text=message)
         self.password_entry.configure(border_color=COLORS["danger"])
         
     def unlock_vault(self):
+        if self.busy: return
         self.password_entry.configure(border_color=COLORS["input_bg"])
         self.error_label.configure(text="")
         
@@ -167,8 +264,18 @@ class LoginWindow(ctk.CTk):
         pwd = self.password_entry.get()
         if not pwd: return
         
-        if self.kdbx_manager.load_database(pwd):
-            self.on_login_success(self.kdbx_manager)
+        manager = self.kdbx_manager
+        # Key derivation, XML parse and index build all run off the UI thread
+        self.start_task(lambda: manager.load_database(pwd),
+                               lambda ok, error: self.on_unlock_done(manager, ok, error),
+                               "Unlocking vault…")
+    
+    def on_unlock_done(self, manager, ok, error):
+        if error:
+            self.show_error(f"Failed to open vault: {error}")
+            return
+        if ok:
+            self.on_login_success(manager)
             self.destroy()
         else:
             self.failed_attempts += 1
@@ -0,0 +1,103 @@
+from ..core import fuzzy
+from .tasks import run_in_background
+
+class SearchController:
+    """
+    Drives the search box: waits for typing to pause, runs the query off the
+    UI thread, drops results that a newer query has overtaken, and narrows the
+    previous candidate set when the new query just extends the old one.
+    Only the final query's results reach on_results(query, entries).
+    """
+
+    DELAY_MS = 150
+
+    # Keys that never change the query text
+    IGNORED_KEYS = {
+        "Up", "Down", "Left", "Right", "Home", "End", "Prior", "Next",
+        "Shift_L", "Shift_R", "Control_L", "Control_R", "Alt_L", "Alt_R",
+        "Caps_Lock", "Tab", "Escape", "Return", "Super_L", "Super_R",
+    }
+
+    def __init__(self, entry_widget, kdbx_manager, get_view, on_results, limit=50):
+        self.entry = entry_widget
+        self.kdbx_manager = kdbx_manager
+        self.get_view = get_view
+        self.on_results = on_results
+        self.limit = limit
+
+        self._after_id = None
+        self._task = None
+        self._last_text = entry_widget.get()
+        # Candidates of the last completed query, for refinement
+        self._prev_query = None
+        self._prev_view = None
+        self._prev_candidates = None
+
+        entry_widget.bind("<KeyRelease>", self.on_key)
+
+    def on_key(self, event=None):
+        if event is not None and event.keysym in self.IGNORED_KEYS:
+            return
+        text = self.entry.get()
+        if text == self._last_text:
+            return # e.g. a modifier combo that didn't edit anything
+        self._last_text = text
+        self.schedule()
+
+    def schedule(self):
+        if self._after_id:
+            self.entry.after_cancel(self._after_id)
+        self._after_id = self.entry.after(self.DELAY_MS, self._run)
+
+    def reset(self):
+        """Forgets cached candidates (call after the vault or view changes)."""
+        self.cancel()
+        self._last_text = self.entry.get()
+        self._prev_query = None
+        self._prev_view = None
+        self._prev_candidates = None
+
+    def cancel(self):
+        if self._after_id:
+            self.entry.after_cancel(self._after_id)
+            self._after_id = None
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def _run(self):
+        self._after_id = None
+        if self._task:
+            self._task.cancel() # stale: a newer query is about to run
+
+        query = self.entry.get().strip()
+        view = self.get_view()
+        within = None
+        if (view == self._prev_view and self._prev_candidates is not None
+                and fuzzy.can_refine(self._prev_query, query)):
+            within = self._prev_candidates
+
+        manager = self.kdbx_manager
+        limit = self.limit
+
+        def search():
+            if not query:
+                return None, manager.get_search_results(view, None, include_secrets=False)
+            candidates = manager.search_candidates(view, query, within)
+            results = manager.get_search_results(view, query, include_secrets=False, ranked=True,
+                                                 limit=limit, candidates=candidates)
+            return candidates, results
+
+        def done(outcome, error):
+            self._task = None
+            if error:
+                return
+            candidates, results = outcome
+            self._prev_query = query
+            self._prev_view = view
+            self._prev_candidates = candidates
+            if self._after_id:
+                return # the user kept typing; a newer query is already queued
+            self.on_results(query, results)
+
+        self._task = run_in_background(self.entry, search, done)
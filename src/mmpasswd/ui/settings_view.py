@@ -2,14 +2,25 @@ import customtkinter as ctk
 from tkinter import filedialog
 from . import dialogs as messagebox
 import csv
+import threading
 from .styles import COLORS, THEMES
-from ..core.import_export import ImportExportManager
+from ..core.import_export import ImportExportManager, ImportCancelled
+from ..core import kdf, generator
+from .tasks import run_in_background
 
 class SettingsView(ctk.CTkScrollableFrame):
+    # Import duplicate handling (label -> KeePassDatabaseManager.DUPLICATE_POLICIES)
+    IMPORT_POLICIES = {"Skip": "skip", "Overwrite": "overwrite", "Keep both": "keep"}
+    # Bulk rotation (label -> view whose entries get new passwords)
+    ROTATE_TARGETS = {"Compromised": "compromised", "Audit findings": "audit"}
+
     def __init__(self, parent, kdbx_manager, app_instance):
         super().__init__(parent, fg_color="transparent")
         self.kdbx_manager = kdbx_manager
         self.app = app_instance # Reference to main app for callbacks
+        self.proposed_kdf = None
+        self.import_cancel = None   # threading.Event while an import runs
+        self.import_progress = None # (rows, rows/sec), written by the import thread
         
         self.setup_ui()
         
@@ -66,6 +77,101 @@ class SettingsView(ctk.CTkScrollableFrame):
                       text_color=COLORS["text_button"],
                       command=self.update_timeout).pack(anchor="w", padx=20, pady=(0, 20))
 
+        # Key Derivation
+        kdf_frame = ctk.CTkFrame(self, fg_color=COLORS["input_bg"])
+        kdf_frame.pack(fill="x", pady=(0, 20))
+        
+        ctk.CTkLabel(kdf_frame, text="Key Derivation", font=("Segoe UI", 14, "bold"), text_color=COLORS["text"]).pack(anchor="w", padx=20, pady=(20, 5))
+        ctk.CTkLabel(kdf_frame, text="Slower unlocks make brute-forcing your master password harder.", text_color=COLORS["text_dim"]).pack(anchor="w", padx=20)
+        
+        params = self.kdbx_manager.get_kdf_parameters()
+        self.kdf_label = ctk.CTkLabel(kdf_frame, text=f"Current: {kdf.describe(params)}" if params else "Current: unknown",
+                                      text_color=COLORS["text"])
+        self.kdf_label.pack(anchor="w", padx=20, pady=(10, 0))
+        
+        ctk.CTkLabel(kdf_frame, text="Target unlock time (seconds)", text_color=COLORS["text_dim"]).pack(anchor="w", padx=20, pady=(10, 0))
+        self.kdf_target_entry = ctk.CTkEntry(kdf_frame, fg_color=COLORS["bg"], text_color=COLORS["text"], width=100)
+        self.kdf_target_entry.pack(anchor="w", padx=20, pady=10)
+        self.kdf_target_entry.insert(0, str(kdf.DEFAULT_TARGET_SECONDS))
+        
+        self.kdf_result_label = ctk.CTkLabel(kdf_frame, text="", text_color=COLORS["text_dim"])
+        self.kdf_result_label.pack(anchor="w", padx=20)
+        
+        kdf_buttons = ctk.CTkFrame(kdf_frame, fg_color="transparent")
+        kdf_buttons.pack(anchor="w", padx=20, pady=(10, 20))
+        self.kdf_benchmark_btn = ctk.CTkButton(kdf_buttons, text="Benchmark", fg_color=COLORS["primary"],
+                                               text_color=COLORS["text_button"], command=self.benchmark_kdf)
+        self.kdf_benchmark_btn.pack(side="left", padx=(0, 10))
+        self.kdf_apply_btn = ctk.CTkButton(kdf_buttons, text="Apply", fg_color=COLORS["sidebar"],
+                                           text_color=COLORS["text"], state="disabled", command=self.apply_kdf)
+        self.kdf_apply_btn.pack(side="left")
+
+        # Breach Check
+        breach_frame = ctk.CTkFrame(self, fg_color=COLORS["input_bg"])
+        breach_frame.pack(fill="x", pady=(0, 20))
+        
+        ctk.CTkLabel(breach_frame, text="Breach Check", font=("Segoe UI", 14, "bold"), text_color=COLORS["text"]).pack(anchor="w", padx=20, pady=(20, 5))
+        ctk.CTkLabel(breach_frame, text="Flag passwords found in a downloaded Have I Been Pwned list (SHA-1, ordered by hash). Nothing leaves this machine.",
+                     text_color=COLORS["text_dim"], wraplength=600, justify="left").pack(anchor="w", padx=20)
+        
+        corpus = self.kdbx_manager.get_config("breach_corpus")
+        self.breach_label = ctk.CTkLabel(breach_frame, text=f"List: {corpus}" if corpus else "List: not set",
+                                         text_color=COLORS["text"])
+        self.breach_label.pack(anchor="w", padx=20, pady=(10, 0))
+        self.breach_status_label = ctk.CTkLabel(breach_frame, text="", text_color=COLORS["text_dim"])
+        self.breach_status_label.pack(anchor="w", padx=20)
+        
+        breach_buttons = ctk.CTkFrame(breach_frame, fg_color="transparent")
+        breach_buttons.pack(anchor="w", padx=20, pady=(10, 20))
+        ctk.CTkButton(breach_buttons, text="Choose File…", fg_color=COLORS["sidebar"],
+                      text_color=COLORS["text"], command=self.choose_breach_corpus).pack(side="left", padx=(0, 10))
+        ctk.CTkButton(breach_buttons, text="Scan Now", fg_color=COLORS["primary"],
+                      text_color=COLORS["text_button"], command=self.scan_breaches).pack(side="left")
+
+        # Password Generator
+        gen_frame = ctk.CTkFrame(self, fg_color=COLORS["input_bg"])
+        gen_frame.pack(fill="x", pady=(0, 20))
+        
+        ctk.CTkLabel(gen_frame, text="Password Generator", font=("Segoe UI", 14, "bold"), text_color=COLORS["text"]).pack(anchor="w", padx=20, pady=(20, 5))
+        ctk.CTkLabel(gen_frame, text="Used by 🎲 when editing an entry and by Rotate below.", text_color=COLORS["text_dim"]).pack(anchor="w", padx=20)
+        
+        ctk.CTkLabel(gen_frame, text="Length", text_color=COLORS["text_dim"]).pack(anchor="w", padx=20, pady=(10, 0))
+        self.gen_length_entry = ctk.CTkEntry(gen_frame, fg_color=COLORS["bg"], text_color=COLORS["text"], width=100)
+        self.gen_length_entry.pack(anchor="w", padx=20, pady=(5, 10))
+        self.gen_length_entry.insert(0, self.kdbx_manager.get_config("generator_length") or str(generator.DEFAULT_POLICY["length"]))
+        
+        self.gen_ambiguous_var = ctk.BooleanVar(value=self.kdbx_manager.get_config("generator_exclude_ambiguous") == "1")
+        ctk.CTkCheckBox(gen_frame, text="Avoid look-alike characters (0 O o 1 I l |)", variable=self.gen_ambiguous_var,
+                        text_color=COLORS["text"]).pack(anchor="w", padx=20)
+        
+        ctk.CTkLabel(gen_frame, text="Site rules, one per line, e.g. \"example.com length=12 symbols=no\"\n"
+                                     "(settings: length, upper, lower, digits, symbols, symbol_set, exclude_ambiguous, exclude)",
+                     text_color=COLORS["text_dim"], justify="left").pack(anchor="w", padx=20, pady=(10, 5))
+        self.gen_rules_box = ctk.CTkTextbox(gen_frame, fg_color=COLORS["bg"], text_color=COLORS["text"], height=80)
+        self.gen_rules_box.pack(fill="x", padx=20)
+        self.gen_rules_box.insert("1.0", self.kdbx_manager.get_config("generator_site_rules", ""))
+        
+        ctk.CTkButton(gen_frame, text="Save", fg_color=COLORS["primary"],
+                      text_color=COLORS["text_button"],
+                      command=self.save_generator_settings).pack(anchor="w", padx=20, pady=(10, 20))
+        
+        # Bulk rotation
+        ctk.CTkLabel(gen_frame, text="Rotate Passwords", font=("Segoe UI", 14, "bold"), text_color=COLORS["text"]).pack(anchor="w", padx=20, pady=(0, 5))
+        ctk.CTkLabel(gen_frame, text="Give every entry in a list a new generated password. Change them on the sites too.",
+                     text_color=COLORS["text_dim"]).pack(anchor="w", padx=20)
+        self.rotate_target = ctk.CTkSegmentedButton(gen_frame, values=list(self.ROTATE_TARGETS),
+                                                    width=300, font=("Segoe UI", 12, "bold"),
+                                                    selected_color=COLORS["primary"],
+                                                    selected_hover_color=COLORS["primary_hover"])
+        self.rotate_target.set("Compromised")
+        self.rotate_target.pack(anchor="w", padx=20, pady=(10, 0))
+        self.rotate_btn = ctk.CTkButton(gen_frame, text="Rotate…", fg_color=COLORS["danger"],
+                                        hover_color=COLORS["danger_hover"],
+                                        text_color=COLORS["text_button"], command=self.rotate_passwords)
+        self.rotate_btn.pack(anchor="w", padx=20, pady=(10, 5))
+        self.rotate_status_label = ctk.CTkLabel(gen_frame, text="", text_color=COLORS["text_dim"])
+        self.rotate_status_label.pack(anchor="w", padx=20, pady=(0, 15))
+
         # --- Data ---
         self.create_section("Data Management")
         
@@ -73,12 +179,32 @@ class SettingsView(ctk.CTkScrollableFrame):
         data_frame.pack(fill="x", pady=(0, 20))
 
         ctk.CTkLabel(data_frame, text="Import Passwords", font=("Segoe UI", 14, "bold"), text_color=COLORS["text"]).pack(anchor="w", padx=20, pady=(20, 5))
-        ctk.CTkLabel(data_frame, text="Import data from a simplified CSV file.", text_color=COLORS["text_dim"]).pack(anchor="w", padx=20)
+        ctk.CTkLabel(data_frame, text="Import from Chrome, Firefox, 1Password (CSV), Bitwarden (JSON), KeePass (XML) or our own CSV.", text_color=COLORS["text_dim"]).pack(anchor="w", padx=20)
         
-        ctk.CTkButton(data_frame, text="📥 Import from CSV", fg_color=COLORS["sidebar"],
-                      text_color=COLORS["text"], 
-                      border_width=1, border_color=COLORS["text_dim"],
-                      command=self.import_data).pack(anchor="w", padx=20, pady=20)
+        ctk.CTkLabel(data_frame, text="Entries already in the vault with a different password:",
+                     text_color=COLORS["text_dim"]).pack(anchor="w", padx=20, pady=(15, 5))
+        self.import_policy = ctk.CTkSegmentedButton(data_frame, values=list(self.IMPORT_POLICIES),
+                                                    width=300, font=("Segoe UI", 12, "bold"),
+                                                    selected_color=COLORS["primary"],
+                                                    selected_hover_color=COLORS["primary_hover"])
+        self.import_policy.set("Skip")
+        self.import_policy.pack(anchor="w", padx=20)
+
+        import_buttons = ctk.CTkFrame(data_frame, fg_color="transparent")
+        import_buttons.pack(anchor="w", padx=20, pady=(20, 5))
+        self.import_btn = ctk.CTkButton(import_buttons, text="📥 Import from File", fg_color=COLORS["sidebar"],
+                                        text_color=COLORS["text"], 
+                                        border_width=1, border_color=COLORS["text_dim"],
+                                        command=self.import_data)
+        self.import_btn.pack(side="left", padx=(0, 10))
+        # Shown while an import runs
+        self.import_cancel_btn = ctk.CTkButton(import_buttons, text="Cancel", fg_color=COLORS["danger"],
+                                               hover_color=COLORS["danger_hover"],
+                                               text_color=COLORS["text_button"], width=80,
+                                               command=self.cancel_import)
+        
+        self.import_status_label = ctk.CTkLabel(data_frame, text="", text_color=COLORS["text_dim"])
+        self.import_status_label.pack(anchor="w", padx=20, pady=(0, 15))
 
     def create_section(self, title):
         ctk.CTkLabel(self, text=title, font=("Segoe UI", 18, "bold"), text_color=COLORS["text_dim"]).pack(anchor="w", pady=(10, 5))
@@ -96,17 +222,179 @@ class SettingsView(ctk.CTkScrollableFrame):
             self.app.reset_lock_timer()
             
             # Persist to DB
-            self.kdbx_manager.set_config("lock_timeout", val)
-            
-            messagebox.showinfo("Success", "Auto-Lock timeout updated.")
+            if self.app.try_write(self.kdbx_manager.set_config, "lock_timeout", val):
+                messagebox.showinfo("Success", "Auto-Lock timeout updated.")
         except ValueError:
              messagebox.showerror("Error", "Invalid number")
 
+    def benchmark_kdf(self):
+        try:
+            target = float(self.kdf_target_entry.get())
+        except ValueError:
+            messagebox.showerror("Error", "Invalid number")
+            return
+        if not 0.1 <= target <= 10:
+            messagebox.showerror("Error", "Choose a target between 0.1 and 10 seconds")
+            return
+            
+        current = self.kdbx_manager.get_kdf_parameters() or {}
+        algorithm = current.get("algorithm", "argon2id")
+        
+        def done(params, error):
+            self.kdf_benchmark_btn.configure(state="normal")
+            if error:
+                self.kdf_result_label.configure(text=f"Benchmark failed: {error}")
+                return
+            self.proposed_kdf = params
+            self.kdf_result_label.configure(text=f"Proposed: {kdf.describe(params)} (~{params['seconds']:.2f}s here)")
+            self.kdf_apply_btn.configure(state="normal")
+        
+        self.kdf_benchmark_btn.configure(state="disabled")
+        self.kdf_apply_btn.configure(state="disabled")
+        self.kdf_result_label.configure(text="Benchmarking…")
+        run_in_background(self, lambda: kdf.calibrate(target, algorithm=algorithm), done)
+
+    def apply_kdf(self):
+        if not self.proposed_kdf: return
+        if not messagebox.askyesno("Re-key Vault", "Re-encrypt the vault with the new key derivation settings?"):
+            return
+        params = self.proposed_kdf
+        
+        def done(result, error):
+            self.kdf_benchmark_btn.configure(state="normal")
+            if error:
+                messagebox.showerror("Error", f"Re-key failed: {error}")
+                return
+            self.proposed_kdf = None
+            self.kdf_label.configure(text=f"Current: {kdf.describe(params)}")
+            self.kdf_result_label.configure(text="")
+            messagebox.showinfo("Success", "Vault re-keyed.")
+        
+        self.kdf_apply_btn.configure(state="disabled")
+        self.kdf_benchmark_btn.configure(state="disabled")
+        self.kdf_result_label.configure(text="Re-keying vault…")
+        run_in_background(self, lambda: self.kdbx_manager.set_kdf_parameters(params), done)
+
+    def choose_breach_corpus(self):
+        filename = filedialog.askopenfilename(filetypes=[("Hash Lists", "*.txt"), ("All Files", "*.*")])
+        if not filename: return
+        if not self.app.try_write(self.kdbx_manager.set_config, "breach_corpus", filename):
+            return
+        self.breach_label.configure(text=f"List: {filename}")
+        self.scan_breaches()
+
+    def scan_breaches(self):
+        if not self.kdbx_manager.get_config("breach_corpus"):
+            messagebox.showerror("Error", "Choose a breach list first.")
+            return
+        if self.app.breach_task:
+            self.breach_status_label.configure(text="A scan is already running…")
+            return
+        
+        def done(message):
+            if self.winfo_exists():
+                self.breach_status_label.configure(text=message)
+        
+        self.breach_status_label.configure(text="Scanning…")
+        self.app.start_breach_scan(done)
+
+    def save_generator_settings(self):
+        length = self.gen_length_entry.get().strip()
+        rules = self.gen_rules_box.get("1.0", "end").strip()
+        try:
+            if not length.isdigit():
+                raise ValueError("Length must be a number")
+            policy = {"length": int(length), "exclude_ambiguous": self.gen_ambiguous_var.get()}
+            generator.generate_passwords(1, policy) # checks the length
+            for site_policy in generator.parse_site_rules(rules).values():
+                generator.generate_passwords(1, dict(policy, **site_policy))
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        manager = self.kdbx_manager
+
+        def store():
+            manager.set_config("generator_length", length)
+            manager.set_config("generator_exclude_ambiguous", "1" if self.gen_ambiguous_var.get() else "0")
+            manager.set_config("generator_site_rules", rules)
+
+        if self.app.try_write(store):
+            messagebox.showinfo("Success", "Generator settings saved.")
+
+    def rotate_passwords(self):
+        target = self.rotate_target.get()
+        ids = [e['id'] for e in self.kdbx_manager.get_entries(self.ROTATE_TARGETS[target], include_secrets=False)]
+        if not ids:
+            self.rotate_status_label.configure(text=f"No entries in {target}.")
+            return
+        if not messagebox.askyesno("Rotate Passwords",
+                                   f"Replace the passwords of {len(ids)} entries with new generated ones?\n"
+                                   "You will need to change them on each site as well."):
+            return
+        manager = self.kdbx_manager
+        base, rules = generator.configured_policy(manager)
+        
+        def done(changed, error):
+            self.rotate_btn.configure(state="normal")
+            if error:
+                self.rotate_status_label.configure(text="")
+                messagebox.showerror("Error", f"Rotation failed, nothing was changed: {error}")
+                return
+            self.rotate_status_label.configure(text=f"Rotated {len(changed)} passwords.")
+            self.app.apply_changes()
+        
+        self.rotate_btn.configure(state="disabled")
+        self.rotate_status_label.configure(text="Rotating…")
+        run_in_background(self, lambda: generator.rotate(manager, ids, base, rules), done)
+
     def import_data(self):
-        filename = filedialog.askopenfilename(filetypes=[("CSV Files", "*.csv")])
-        if filename:
-            try:
-                count = ImportExportManager.import_csv(self.kdbx_manager, filename)
-                messagebox.showinfo("Success", f"Imported {count} passwords.")
-            except Exception as e:
-                messagebox.showerror("Error", f"Import failed: {e}")
+        filename = filedialog.askopenfilename(filetypes=[("Password Exports", "*.csv *.json *.xml"),
+                                                         ("CSV Files", "*.csv"),
+                                                         ("JSON Files", "*.json"),
+                                                         ("XML Files", "*.xml")])
+        if not filename: return
+
+        cancel = threading.Event()
+        self.import_cancel = cancel
+        self.import_progress = None
+
+        def progress(rows, rate):
+            self.import_progress = (rows, rate) # picked up by poll_import()
+
+        def done(result, error):
+            self.import_cancel = None
+            self.import_btn.configure(state="normal")
+            self.import_cancel_btn.pack_forget()
+            if isinstance(error, ImportCancelled):
+                self.import_status_label.configure(text="Import cancelled, nothing was changed.")
+                return
+            self.import_status_label.configure(text="")
+            if error:
+                messagebox.showerror("Error", f"Import failed, nothing was changed: {error}")
+            else:
+                messagebox.showinfo("Success", f"Imported {len(result.added)} passwords, "
+                                               f"updated {len(result.overwritten)}, "
+                                               f"skipped {result.skipped} already in the vault.")
+
+        self.import_btn.configure(state="disabled")
+        self.import_cancel_btn.configure(state="normal")
+        self.import_cancel_btn.pack(side="left")
+        self.import_status_label.configure(text="Importing…")
+        manager = self.kdbx_manager
+        policy = self.IMPORT_POLICIES[self.import_policy.get()]
+        run_in_background(self, lambda: ImportExportManager.import_file(manager, filename, progress, cancel,
+                                                                        policy=policy), done)
+        self.poll_import(cancel)
+
+    def poll_import(self, cancel):
+        if self.import_cancel is not cancel or not self.winfo_exists(): return # finished
+        if self.import_progress and not cancel.is_set():
+            rows, rate = self.import_progress
+            self.import_status_label.configure(text=f"Imported {rows:,} rows ({rate:,.0f} rows/s)…")
+        self.after(200, lambda: self.poll_import(cancel))
+
+    def cancel_import(self):
+        if not self.import_cancel: return
+        self.import_cancel.set()
+        self.import_cancel_btn.configure(state="disabled")
+        self.import_status_label.configure(text="Cancelling, removing imported rows…")
@@ -37,8 +37,60 @@ THEMES = {
     }
 }
 
+class ThemeColor(str):
+    """
+    A colour that remembers which COLORS key (role) it came from, e.g.
+    COLORS["primary"].role == "primary". Widgets keep the object they were
+    given, so restyle() can tell which role each colour option plays.
+    """
+    __slots__ = ('role',)
+
+    def __new__(cls, value, role):
+        color = super().__new__(cls, value)
+        color.role = role
+        return color
+
+# Widget options that may hold a theme colour. bg_color is left out: CTk
+# frames hand their fg_color down to their children's bg_color themselves.
+COLOR_OPTIONS = (
+    "fg_color", "text_color", "hover_color", "border_color",
+    "button_color", "button_hover_color", "progress_color",
+    "selected_color", "selected_hover_color", "placeholder_text_color",
+)
+
+def theme_colors(theme_name):
+    return {role: ThemeColor(value, role) for role, value in THEMES[theme_name]["colors"].items()}
+
 # Current active colors - defaults to Midnight
-COLORS = THEMES["Dark"]["colors"].copy()
+COLORS = theme_colors("Dark")
+
+def set_theme(theme_name):
+    """Switches COLORS to another theme. Existing widgets need restyle()."""
+    COLORS.clear()
+    COLORS.update(theme_colors(theme_name))
+
+def restyle(root):
+    """
+    Recolours root and every widget below it in place: any colour option
+    holding a ThemeColor is set to the current colour for the same role.
+    Colours that aren't theme roles ("transparent", CTk defaults) are left alone.
+    """
+    stack = [root]
+    while stack:
+        widget = stack.pop()
+        stack.extend(widget.winfo_children())
+        changes = {}
+        for option in COLOR_OPTIONS:
+            # CTk widgets keep their options as _<option>; plain tk widgets have none
+            if not hasattr(widget, "_" + option):
+                continue
+            value = widget.cget(option)
+            if isinstance(value, ThemeColor):
+                new = COLORS.get(value.role)
+                if new is not None and new != value:
+                    changes[option] = new
+        if changes:
+            widget.configure(**changes)
 
 WEBSITE_ICONS = {
     "gmail": "📧", "google": "🔍", "facebook": "👤", "twitter": "🐦",
@@ -0,0 +1,40 @@
+import threading
+
+class BackgroundTask:
+    """
+    Runs func() on a worker thread and hands (result, error) to on_done
+    back on the Tk thread. Tk is never touched from the worker: the widget
+    polls for completion with after().
+    """
+
+    POLL_MS = 50
+
+    def __init__(self, widget, func, on_done):
+        self.widget = widget
+        self.on_done = on_done
+        self.cancelled = False
+        self._outcome = {}
+        self._thread = threading.Thread(target=self._work, args=(func,), daemon=True)
+        self._thread.start()
+        widget.after(self.POLL_MS, self._poll)
+
+    def _work(self, func):
+        try:
+            self._outcome['result'] = func()
+        except Exception as e:
+            self._outcome['error'] = e
+
+    def _poll(self):
+        if self.cancelled or not self.widget.winfo_exists():
+            return
+        if self._thread.is_alive():
+            self.widget.after(self.POLL_MS, self._poll)
+            return
+        self.on_done(self._outcome.get('result'), self._outcome.get('error'))
+
+    def cancel(self):
+        """Drops the result. The thread itself can't be interrupted and runs to completion."""
+        self.cancelled = True
+
+def run_in_background(widget, func, on_done):
+    return BackgroundTask(widget, func, on_done)
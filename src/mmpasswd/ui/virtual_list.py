@@ -0,0 +1,230 @@
+import sys
+import tkinter
+import customtkinter as ctk
+from .styles import COLORS
+
+class VirtualList(ctk.CTkFrame):
+    """
+    Scrollable list that only creates widgets for the visible rows.
+
+    A fixed pool of row buttons, sized to the viewport, is re-bound to
+    whichever items are scrolled into view. Rendering therefore costs
+    O(visible rows) no matter how many items the list holds.
+
+    format_row(item) -> str gives a row's text; on_select(item) fires on
+    click or keyboard selection (Up/Down/Home/End/PageUp/PageDown/Return).
+    If the items are kept ordered by sort_key(item), single items can be
+    inserted, replaced or removed without touching the rest (see insert()).
+    """
+
+    ROW_HEIGHT = 61 # 60px button + 1px gap, like the old packed list
+
+    def __init__(self, parent, format_row, on_select, sort_key=None, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.format_row = format_row
+        self.on_select = on_select
+        self.sort_key = sort_key
+
+        self.items = []
+        self.offset = 0          # scroll position in pixels
+        self.selected_index = None
+        self.rows = []           # pooled buttons
+        self.row_items = []      # item index each pooled row currently shows
+
+        # Rows are place()d, so the viewport doesn't size itself from them
+        self.viewport = ctk.CTkFrame(self, fg_color="transparent", corner_radius=0,
+                                     width=kwargs.get("width", 200))
+        self.viewport.pack(side="left", fill="both", expand=True, padx=(5, 0), pady=5)
+        self.scrollbar = ctk.CTkScrollbar(self, command=self.on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y", pady=5)
+
+        self.viewport.bind("<Configure>", lambda e: self.ensure_pool())
+        self.bind_scroll(self.viewport)
+
+        # Keyboard navigation (the list takes focus when clicked)
+        for key, step in (("<Up>", -1), ("<Down>", 1)):
+            self.bind_key(key, lambda e, s=step: self.move_selection(s))
+        self.bind_key("<Prior>", lambda e: self.move_selection(-self.visible_count()))
+        self.bind_key("<Next>", lambda e: self.move_selection(self.visible_count()))
+        self.bind_key("<Home>", lambda e: self.select_index(0))
+        self.bind_key("<End>", lambda e: self.select_index(len(self.items) - 1))
+        self.bind_key("<Return>", lambda e: self.activate())
+
+    # --- Setup ---
+
+    def bind_key(self, sequence, handler):
+        # CTkFrame.bind() goes to its inner canvas, but focus_set() (see
+        # on_row_click()) focuses the frame itself, which gets the key events
+        tkinter.Misc.bind(self, sequence, handler, add="+")
+
+    def bind_scroll(self, widget):
+        if sys.platform.startswith("linux"):
+            widget.bind("<Button-4>", lambda e: self.scroll_by(-self.ROW_HEIGHT))
+            widget.bind("<Button-5>", lambda e: self.scroll_by(self.ROW_HEIGHT))
+        else:
+            widget.bind("<MouseWheel>", self.on_mousewheel)
+
+    def visible_count(self):
+        return max(1, self.viewport.winfo_height() // self.ROW_HEIGHT)
+
+    def ensure_pool(self):
+        """Grows the row pool to cover the viewport, then redraws."""
+        needed = self.viewport.winfo_height() // self.ROW_HEIGHT + 2
+        while len(self.rows) < needed:
+            i = len(self.rows)
+            row = ctk.CTkButton(self.viewport, text="", fg_color="transparent",
+                                hover_color=COLORS["sidebar"], anchor="w",
+                                height=self.ROW_HEIGHT - 1, text_color=COLORS["text"],
+                                command=lambda i=i: self.on_row_click(i))
+            self.bind_scroll(row)
+            self.rows.append(row)
+            self.row_items.append(None)
+        self.render()
+
+    # --- Data ---
+
+    def set_items(self, items, keep_position=False):
+        self.items = list(items)
+        self.selected_index = None
+        if not keep_position:
+            self.offset = 0
+        self.render()
+
+    def index_of(self, predicate):
+        return next((i for i, item in enumerate(self.items) if predicate(item)), None)
+
+    def _sorted_position(self, item):
+        # bisect_right by sort_key, so equal keys keep their arrival order
+        key = self.sort_key(item)
+        lo, hi = 0, len(self.items)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if key < self.sort_key(self.items[mid]):
+                hi = mid
+            else:
+                lo = mid + 1
+        return lo
+
+    def insert(self, item):
+        """Inserts item at its sorted position. Returns the new index."""
+        index = self._sorted_position(item)
+        self.items.insert(index, item)
+        if self.selected_index is not None and self.selected_index >= index:
+            self.selected_index += 1
+        self.render()
+        return index
+
+    def remove(self, index):
+        del self.items[index]
+        if self.selected_index == index:
+            self.selected_index = None
+        elif self.selected_index is not None and self.selected_index > index:
+            self.selected_index -= 1
+        self.scroll_to(self.offset) # re-clamp in case the list got shorter
+
+    def replace(self, index, item):
+        """Swaps in a new version of an item, moving it if its sort key changed."""
+        if self.sort_key(item) == self.sort_key(self.items[index]):
+            self.items[index] = item
+            self.render()
+            return index
+        selected = self.selected_index == index
+        self.remove(index)
+        index = self.insert(item)
+        if selected:
+            self.selected_index = index
+            self.render()
+        return index
+
+    # --- Scrolling ---
+
+    def max_offset(self):
+        return max(0, len(self.items) * self.ROW_HEIGHT - self.viewport.winfo_height())
+
+    def scroll_to(self, offset):
+        self.offset = int(max(0, min(offset, self.max_offset())))
+        self.render()
+
+    def scroll_by(self, delta):
+        self.scroll_to(self.offset + delta)
+
+    def on_mousewheel(self, event):
+        if sys.platform == "darwin":
+            self.scroll_by(-event.delta * self.ROW_HEIGHT // 4)
+        else:
+            self.scroll_by(-event.delta // 120 * self.ROW_HEIGHT)
+
+    def on_scrollbar(self, action, value, unit=None):
+        total = len(self.items) * self.ROW_HEIGHT
+        if action == "moveto":
+            self.scroll_to(float(value) * total)
+        elif action == "scroll":
+            step = self.viewport.winfo_height() if unit == "pages" else self.ROW_HEIGHT
+            self.scroll_by(int(value) * step)
+
+    def ensure_visible(self, index):
+        top = index * self.ROW_HEIGHT
+        bottom = top + self.ROW_HEIGHT
+        height = self.viewport.winfo_height()
+        if top < self.offset:
+            self.scroll_to(top)
+        elif bottom > self.offset + height:
+            self.scroll_to(bottom - height)
+        else:
+            self.render()
+
+    # --- Rendering ---
+
+    def render(self):
+        height = self.viewport.winfo_height()
+        first = self.offset // self.ROW_HEIGHT
+        for slot, row in enumerate(self.rows):
+            index = first + slot
+            y = index * self.ROW_HEIGHT - self.offset
+            if index >= len(self.items) or y >= height:
+                if self.row_items[slot] is not None:
+                    row.place_forget()
+                    self.row_items[slot] = None
+                continue
+
+            selected = index == self.selected_index
+            row.configure(text=self.format_row(self.items[index]),
+                          fg_color=COLORS["bg"] if selected else "transparent")
+            row.place(x=0, y=y, relwidth=1)
+            self.row_items[slot] = index
+
+        total = len(self.items) * self.ROW_HEIGHT
+        if total <= height or total == 0:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.offset / total, (self.offset + height) / total)
+
+    # --- Selection ---
+
+    def on_row_click(self, slot):
+        index = self.row_items[slot]
+        if index is None: return
+        self.focus_set()
+        self.select_index(index)
+
+    def select_index(self, index):
+        if not self.items: return
+        index = max(0, min(index, len(self.items) - 1))
+        self.selected_index = index
+        self.ensure_visible(index)
+        self.on_select(self.items[index])
+
+    def move_selection(self, step):
+        if self.selected_index is None:
+            self.select_index(0 if step > 0 else len(self.items) - 1)
+        else:
+            self.select_index(self.selected_index + step)
+        return "break"
+
+    def activate(self):
+        if self.selected_index is not None:
+            self.on_select(self.items[self.selected_index])
+
+    def clear_selection(self):
+        self.selected_index = None
+        self.render()